@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from app.config import (ADMISSION_AUTH_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_READ_LIMIT,
+                        ADMISSION_RETRY_AFTER, ADMISSION_WRITE_LIMIT)
+from app.metrics import admission_in_flight, admission_queue_depth, admission_shed, admission_wait_duration
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Маршруты, которые хешируют или проверяют пароль через bcrypt
+AUTH_PATHS = {"/users/", "/users/token"}
+# Служебные маршруты не ограничиваются: мониторинг должен отвечать и при перегрузке
+EXEMPT_PATHS = ("/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class AdmissionLimiter:
+    """
+    Ограничение одновременных запросов группы с ограниченной очередью.
+    Освободившийся слот передаётся первому ожидающему напрямую, поэтому очередь обслуживается по порядку
+    и новые запросы не обгоняют ждущих.
+    """
+
+    def __init__(self, group: str, limit: int, queue_size: int, timeout: float):
+        self.group = group
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def _update_gauges(self):
+        admission_in_flight.set(self.in_flight, group=self.group)
+        admission_queue_depth.set(len(self._waiters), group=self.group)
+
+    async def acquire(self):
+        """
+        Занимает слот; ждёт в очереди не дольше timeout. Бросает Overloaded, если очередь полна
+        или срок ожидания истёк.
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.queue_size:
+            admission_shed.inc(group=self.group, reason="queue_full")
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except (TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан этому запросу, но он его не дождался — отдаём слот следующему
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                self._update_gauges()
+            if isinstance(exc, TimeoutError):
+                admission_shed.inc(group=self.group, reason="timeout")
+                raise Overloaded("timeout") from None
+            raise
+        finally:
+            admission_wait_duration.observe(time.perf_counter() - started, group=self.group)
+
+    def release(self):
+        # Слот не освобождается, а переходит к первому ожидающему: in_flight не меняется
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+        self._update_gauges()
+
+
+def route_group(scope) -> str | None:
+    """
+    Группа маршрута по методу и пути: auth — регистрация и вход (bcrypt), read — чтение,
+    write — остальные изменения, в том числе обновление токена. None — маршрут без ограничений.
+    """
+    path, method = scope["path"], scope["method"]
+    if path.startswith(EXEMPT_PATHS):
+        return None
+    if method == "POST" and path in AUTH_PATHS:
+        return "auth"
+    return "read" if method in READ_METHODS else "write"
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware: пропускает в приложение не больше заданного числа запросов каждой группы.
+    Лишние ждут в очереди с крайним сроком, а при полной очереди или по истечении срока сразу получают
+    503 с Retry-After: это дешевле, чем ждать соединения в пуле до DB_POOL_TIMEOUT и замедлять всех.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {
+            group: AdmissionLimiter(group, limit, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT)
+            for group, limit in (("read", ADMISSION_READ_LIMIT), ("write", ADMISSION_WRITE_LIMIT),
+                                 ("auth", ADMISSION_AUTH_LIMIT))
+        }
+
+    async def __call__(self, scope, receive, send):
+        group = route_group(scope) if scope["type"] == "http" else None
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[group]
+        try:
+            await limiter.acquire()
+        except Overloaded:
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Server is busy, try again later"}).encode()
+        await send({"type": "http.response.start", "status": 503, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -1,14 +1,25 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
+import time
+from dataclasses import dataclass
 import jwt
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.users import User as UserModel
-from app.config import SECRET_KEY, ALGORITHM
+from app.config import SECRET_KEY, ALGORITHM, USER_CACHE_SIZE, USER_CACHE_TTL, AUTH_TRUST_TOKEN_CLAIMS
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE, PASSWORD_HASH_NICE
 from app.db_depends import get_async_db
+from app.cache import ExpiringMap, TTLCache
+from app.metrics import password_hash_duration, password_hash_rejected
 
 
 # Создаём контекст для хеширования с использованием bcrypt
@@ -18,6 +29,35 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """
+    Неизменяемый снимок аутентифицированного пользователя. Один и тот же объект из кэша получают
+    одновременные запросы, поэтому кэшируется не ORM-объект, а снимок.
+    """
+    id: int
+    email: str
+    role: str
+    is_active: bool = True
+
+
+# Активные пользователи по claim id токена, чтобы не ходить в базу на каждый защищённый запрос
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# Время отзыва токенов пользователя; запись нужна, пока живут выданные до отзыва access-токены.
+# Размер не ограничен: вытесненная запись снова открыла бы доступ по отозванным токенам
+revoked_users = ExpiringMap(ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def invalidate_user(user_id: int):
+    """
+    Сбрасывает пользователя из кэша и отзывает его ранее выданные токены.
+    Вызывается при деактивации пользователя или смене его роли.
+    """
+    revoked_users.set(user_id, time.time())
+    user_cache.delete(user_id)
+
 def hash_password(password: str) -> str:
     """
     Преобразует пароль в хеш с использованием bcrypt.
@@ -32,13 +72,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _lower_thread_priority():
+    """
+    Понижает приоритет текущего потока пула bcrypt. Только в Linux: там nice задаётся для отдельного потока,
+    а на других системах тот же вызов изменил бы приоритет всего процесса.
+    """
+    if sys.platform == "linux" and PASSWORD_HASH_NICE:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PASSWORD_HASH_NICE)
+        except OSError:
+            pass
+
+
+# bcrypt отпускает GIL, поэтому хеширование в отдельных потоках не блокирует цикл событий,
+# а пониженный приоритет не даёт ему отнимать у цикла процессор
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt",
+                                       initializer=_lower_thread_priority)
+_password_jobs = 0  # Задачи, которые выполняются или ждут в очереди пула
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+async def _run_password_job(operation: str, func, *args):
+    """
+    Выполняет функцию bcrypt в пуле потоков.
+    Если пул и очередь заполнены, сразу отвечает 503, а не копит запросы.
+    """
+    global _password_jobs
+    if _password_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE:
+        password_hash_rejected.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs += 1
+    try:
+        result, duration = await asyncio.get_running_loop().run_in_executor(password_executor, _timed, func, *args)
+    finally:
+        _password_jobs -= 1
+    # Время самого bcrypt без ожидания в очереди пула
+    password_hash_duration.observe(duration, operation=operation)
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Асинхронная версия hash_password, не блокирующая цикл событий.
+    """
+    return await _run_password_job("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Асинхронная версия verify_password, не блокирующая цикл событий.
+    """
+    return await _run_password_job("verify", verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     """
-    Создаёт JWT с payload (sub, role, id, exp).
+    Создаёт JWT с payload (sub, role, id, exp, iat).
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire, "iat": now})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -52,10 +154,16 @@ def create_refresh_token(data: dict):          # New
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def active_user_stmt(email: str):
+    return select(UserModel).where(UserModel.email == email, UserModel.is_active == True)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme),
-                           db: AsyncSession = Depends(get_async_db)):
+                           db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
     """
-    Проверяет JWT и возвращает пользователя из базы.
+    Проверяет JWT и возвращает пользователя из кэша или из базы.
+    При AUTH_TRUST_TOKEN_CLAIMS пользователь собирается из подписанных claims без обращения к базе,
+    если его токены не были отозваны.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,6 +173,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
+        user_id: int | None = payload.get("id")
         if email is None:
             raise credentials_exception
     except jwt.ExpiredSignatureError:
@@ -75,14 +184,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
         )
     except jwt.PyJWTError:
         raise credentials_exception
-    result = await db.scalars(
-        select(UserModel).where(UserModel.email == email, UserModel.is_active == True))
-    user = result.first()
-    if user is None:
+
+    if user_id is not None:
+        revoked_at = revoked_users.get(user_id)
+        if revoked_at is None or payload.get("iat", 0) > revoked_at:
+            if AUTH_TRUST_TOKEN_CLAIMS:
+                return CurrentUser(id=user_id, email=email, role=payload.get("role"))
+            user = user_cache.get(user_id)
+            if user is not None:
+                return user
+
+    result = await db.scalars(active_user_stmt(email))
+    db_user = result.first()
+    if db_user is None:
         raise credentials_exception
+    user = CurrentUser(id=db_user.id, email=db_user.email, role=db_user.role, is_active=db_user.is_active)
+    user_cache.set(user.id, user)
     return user
 
-async def get_current_seller(current_user: UserModel = Depends(get_current_user)):
+async def get_current_seller(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """
     Проверяет, что пользователь имеет роль 'seller'.
     """
@@ -90,7 +210,7 @@ async def get_current_seller(current_user: UserModel = Depends(get_current_user)
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only sellers can perform this action")
     return current_user
 
-async def get_current_buyer(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+async def get_current_buyer(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """
     Проверяет, что пользователь имеет роль 'buyer'.
     """
@@ -98,7 +218,7 @@ async def get_current_buyer(current_user: UserModel = Depends(get_current_user))
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only buyers can perform this action")
     return current_user
 
-async def check_admin(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+async def check_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can perform this action")
     return current_user
\ No newline at end of file
@@ -0,0 +1,144 @@
+import codecs
+import csv
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError, DataError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category as CategoryModel, Product as ProductModel
+from app.schemas import ProductCreate
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000  # Строк на одну вставку и одну транзакцию
+MAX_REPORTED_ERRORS = 1000  # Сколько ошибок по строкам возвращать в отчёте
+
+
+async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Разбивает поток байтов тела запроса на строки, не читая тело целиком.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in body:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_ndjson_rows(body: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Возвращает пары (номер строки, объект) из NDJSON; для нераспознанной строки вместо объекта — текст ошибки.
+    """
+    row_number = 0
+    async for line in _iter_lines(body):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, "Invalid JSON"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Row must be a JSON object"
+
+
+async def iter_csv_rows(body: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Возвращает пары (номер строки, объект) из CSV с заголовком.
+    Пустые значения считаются отсутствующими, чтобы необязательные поля получили None.
+    """
+    header = None
+    record = ""
+    row_number = 0
+    async for line in _iter_lines(body):
+        record += line
+        # Запись закончилась, если все кавычки закрыты (экранированные кавычки удваиваются)
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+
+
+async def _import_chunk(db: AsyncSession, chunk: list[tuple[int, dict | str]], seller_id: int,
+                        report: dict):
+    """
+    Валидирует строки пачки, одним запросом проверяет их категории
+    и вставляет корректные строки одним многострочным INSERT в отдельной транзакции.
+    """
+    errors = []
+    valid: list[tuple[int, ProductCreate]] = []
+    for row_number, row in chunk:
+        if isinstance(row, str):
+            errors.append({"row": row_number, "error": row})
+            continue
+        try:
+            valid.append((row_number, ProductCreate.model_validate(row)))
+        except ValidationError as e:
+            errors.append({"row": row_number,
+                           "error": e.errors(include_url=False, include_context=False, include_input=False)})
+
+    if valid:
+        category_ids = {product.category_id for _, product in valid}
+        result = await db.scalars(select(CategoryModel.id).where(CategoryModel.id.in_(category_ids),
+                                                                 CategoryModel.is_active == True))
+        active_ids = set(result.all())
+        rows = []
+        for row_number, product in valid:
+            if product.category_id in active_ids:
+                rows.append(product.model_dump() | {"seller_id": seller_id})
+            else:
+                errors.append({"row": row_number, "error": "Category not found or inactive"})
+
+        if rows:
+            try:
+                await db.execute(insert(ProductModel), rows)
+                await db.commit()
+                report["inserted"] += len(rows)
+            except (IntegrityError, DataError):
+                await db.rollback()
+                errors.extend({"row": row_number, "error": "Rejected by database"}
+                              for row_number, product in valid if product.category_id in active_ids)
+
+    report["failed"] += len(errors)
+    free = MAX_REPORTED_ERRORS - len(report["errors"])
+    report["errors"].extend(sorted(errors, key=lambda error: error["row"])[:free])
+    report["errors_truncated"] = report["errors_truncated"] or len(errors) > free
+
+
+async def import_products(db: AsyncSession, rows: AsyncIterator[tuple[int, dict | str]],
+                          seller_id: int) -> dict:
+    """
+    Импортирует товары продавца пачками по CHUNK_SIZE строк.
+    Каждая пачка — отдельная транзакция, поэтому ошибка в одной пачке не откатывает уже импортированные.
+    """
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            await _import_chunk(db, chunk, seller_id, report)
+            logger.info("Bulk import for seller %s: %s inserted, %s failed",
+                        seller_id, report["inserted"], report["failed"])
+            chunk = []
+    if chunk:
+        await _import_chunk(db, chunk, seller_id, report)
+    return report
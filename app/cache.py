@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class TTLCache:
+    """
+    LRU-кэш в памяти процесса с ограничением размера и временем жизни записей.
+    Считает попадания и промахи для мониторинга.
+    Если передан sizeof, считает объём записей и вытесняет старые при превышении maxbytes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, sizeof: Callable[[object, object], int] | None = None,
+                 maxbytes: int | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def _pop(self, key, last: bool | None = None):
+        # Все удаления идут через этот метод, чтобы объём записей оставался точным
+        if last is None:
+            item = self._data.pop(key, None)
+        else:
+            key, item = self._data.popitem(last=last)
+        if item is not None and self.sizeof is not None:
+            self.bytes -= self.sizeof(key, item[0])
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None or item[1] < time.monotonic():
+            if item is not None:
+                self._pop(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key, value):
+        self._pop(key)
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        if self.sizeof is not None:
+            self.bytes += self.sizeof(key, value)
+        while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            self._pop(None, last=False)
+
+    def delete(self, key):
+        self._pop(key)
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ExpiringMap:
+    """
+    Словарь с временем жизни записей без ограничения размера: запись не вытесняется раньше срока.
+    Нужен там, где вытеснение меняет смысл (список отзыва токенов). Истёкшие записи удаляются при добавлении,
+    поэтому размер ограничен числом записей, добавленных за ttl.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        # Порядок вставки совпадает с порядком истечения: ttl у всех записей одинаковый
+        self._data: dict = {}
+
+    def _purge(self, now: float):
+        expired = []
+        for key, (_, expires) in self._data.items():
+            if expires >= now:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._data[key]
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None or item[1] < time.monotonic():
+            return default
+        return item[0]
+
+    def set(self, key, value):
+        now = time.monotonic()
+        self._purge(now)
+        self._data.pop(key, None)
+        self._data[key] = (value, now + self.ttl)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики попаданий и промахов, текущий размер кэша и объём записей.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "bytes": self.bytes}
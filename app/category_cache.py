@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CATEGORY_CACHE_TTL
+from app.models.categories import Category as CategoryModel
+
+
+class CategoryTreeCache:
+    """
+    Кэш дерева активных категорий в памяти процесса.
+    Всё дерево загружается одним запросом и перестраивается лениво после invalidate() или истечения TTL.
+    TTL ограничивает устаревание данных, когда категории меняет другой воркер.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self._loaded_at: float | None = None
+        self._categories: dict[int, dict] = {}
+        self._tree: list[dict] = []
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def load(self, db: AsyncSession):
+        """
+        Загружает все активные категории одним запросом и собирает из них вложенное дерево.
+        """
+        generation = self._generation
+        result = await db.execute(
+            select(CategoryModel.id, CategoryModel.name, CategoryModel.parent_id, CategoryModel.is_active)
+            .where(CategoryModel.is_active == True)
+            .order_by(CategoryModel.id)
+        )
+        categories = {row.id: {**row._asdict(), "children": []} for row in result}
+        tree = []
+        for node in categories.values():
+            if node["parent_id"] is None:
+                tree.append(node)
+            elif node["parent_id"] in categories:
+                categories[node["parent_id"]]["children"].append(node)
+            # Категории с неактивным родителем недостижимы из корня и в дерево не попадают
+
+        # Если во время загрузки кэш инвалидировали, результат мог устареть — не сохраняем его
+        if generation == self._generation:
+            self._categories = categories
+            self._tree = tree
+            self._loaded_at = time.monotonic()
+        return categories, tree
+
+    async def _ensure_loaded(self, db: AsyncSession) -> tuple[dict[int, dict], list[dict]]:
+        if self._is_fresh():
+            return self._categories, self._tree
+        async with self._lock:
+            if self._is_fresh():
+                return self._categories, self._tree
+            return await self.load(db)
+
+    async def get_tree(self, db: AsyncSession) -> list[dict]:
+        """
+        Возвращает вложенное дерево активных категорий.
+        """
+        _, tree = await self._ensure_loaded(db)
+        return tree
+
+    async def is_active(self, db: AsyncSession, category_id: int) -> bool:
+        """
+        Проверяет, что категория существует и активна.
+        Промах кэша перепроверяется в базе: категорию могли только что создать в другом воркере.
+        """
+        categories, _ = await self._ensure_loaded(db)
+        if category_id in categories:
+            return True
+        category = await db.scalar(select(CategoryModel.id).where(CategoryModel.id == category_id,
+                                                                  CategoryModel.is_active == True))
+        return category is not None
+
+    def invalidate(self):
+        """
+        Сбрасывает кэш после изменения категорий; дерево перестроится при следующем чтении.
+        """
+        self._generation += 1
+        self._loaded_at = None
+
+
+category_cache = CategoryTreeCache(ttl=CATEGORY_CACHE_TTL)
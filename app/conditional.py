@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """
+    Строит сильный ETag из частей, однозначно определяющих версию ответа.
+    """
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match запроса. Для GET ETag сравниваются слабо, поэтому префикс W/ игнорируется.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _http_date(value: datetime) -> str:
+    # Колонки updated_at хранят UTC без зоны (app.database.utc_now): astimezone() приняла бы его за локальное время
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def set_validators(response: Response, etag: str, last_modified: datetime | None = None):
+    """
+    Добавляет в ответ заголовки ETag и Last-Modified.
+    """
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    """
+    Ответ 304 без тела для клиента, у которого уже есть актуальная версия.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
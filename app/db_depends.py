@@ -1,28 +1,17 @@
-from sqlalchemy.orm import Session
-from fastapi import Depends
-from collections.abc import Generator
-
-from app.database import SessionLocal
-
-
-def get_db() -> Generator[Session, None, None]:
-    """
-    Зависимость для получения сессии базы данных.
-    Создаёт новую сессию для каждого запроса и закрывает её после обработки.
-    """
-    db: Session = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-#async
-
 from collections.abc import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import async_session_maker
+from app.database import async_session_maker, async_read_session_maker, init_engines
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    init_engines()
     async with async_session_maker() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Зависимость для GET-запросов: сессия к реплике для чтения, если она настроена, иначе к основной базе.
+    """
+    init_engines()
+    async with async_read_session_maker() as session:
+        yield session
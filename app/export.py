@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product as ProductModel
+from app.schemas import Product as ProductSchema
+
+FETCH_SIZE = 1000  # Строк за одну выборку из серверного курсора
+EXPORT_FIELDS = list(ProductSchema.model_fields)
+
+
+async def export_products(db: AsyncSession, format: str) -> AsyncIterator[bytes]:
+    """
+    Отдаёт активные товары в NDJSON или CSV порциями по FETCH_SIZE строк.
+    Строки читаются через серверный курсор, поэтому память не зависит от размера каталога.
+    """
+    stmt = (select(*(getattr(ProductModel, field) for field in EXPORT_FIELDS))
+            .where(ProductModel.is_active == True)
+            .order_by(ProductModel.id)
+            .execution_options(yield_per=FETCH_SIZE))
+    result = await db.stream(stmt)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+    async for rows in result.partitions():
+        if format == "csv":
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(row._asdict(), ensure_ascii=False, default=str))
+                buffer.write("\n")
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,92 @@
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.pagination import paginate
+
+
+def schema_columns(model, schema: type[BaseModel], fields: list[str] | None = None) -> list:
+    """
+    Колонки модели, соответствующие полям схемы ответа (или выбранным из них fields), в порядке полей схемы.
+    """
+    return [getattr(model, field) for field in (fields or schema.model_fields)]
+
+
+def sparse_fields(schema: type[BaseModel]):
+    """
+    Зависимость для параметра ?fields=id,name,price: проверяет имена по полям схемы и возвращает их
+    в порядке схемы. Без параметра возвращает None — ответ со всеми полями.
+    """
+    allowed = list(schema.model_fields)
+
+    def dependency(fields: str | None = Query(None, description=f"Поля ответа через запятую: {','.join(allowed)}")
+                   ) -> list[str] | None:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if not requested:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields requested")
+        return [name for name in allowed if name in requested]
+
+    return dependency
+
+
+def with_keys(columns: list, *keys) -> list:
+    """
+    Добавляет к колонкам ответа ключевые (id, колонка сортировки), которых в нём нет: они нужны для курсора.
+    """
+    names = {column.key for column in columns}
+    return [*columns, *(key for key in keys if key is not None and key.key not in names)]
+
+
+def schema_stmt(stmt: Select, model, schema: type[BaseModel], fields: list[str] | None = None, *keys) -> Select:
+    """
+    Запрос stmt, читающий только колонки схемы (или полей fields) и недостающие ключевые колонки keys.
+    """
+    return stmt.with_only_columns(*with_keys(schema_columns(model, schema, fields), *keys))
+
+
+def row_dicts(rows, fields: list[str]) -> list[dict]:
+    """
+    Строки результата в словари полей ответа; ключевые колонки, выбранные только для курсора, отбрасываются.
+    """
+    if not rows or len(rows[0]) == len(fields):
+        return [row._asdict() for row in rows]
+    return [{field: row._mapping[field] for field in fields} for row in rows]
+
+
+def json_response(content) -> Response:
+    """
+    Сериализует ответ один раз через pydantic-core, без повторной валидации response_model.
+    Результат побайтно совпадает с ответом FastAPI для тех же данных.
+    """
+    return Response(to_json(content), media_type="application/json")
+
+
+async def fast_page(db: AsyncSession, stmt: Select, model, schema: type[BaseModel],
+                    cursor: str | None, limit: int, sort_column=None, descending: bool = False,
+                    fields: list[str] | None = None) -> Response:
+    """
+    Быстрый вариант paginate: выбирает из базы только колонки схемы (или полей fields) в виде кортежей
+    и сразу сериализует страницу в JSON.
+    """
+    fields = fields or list(schema.model_fields)
+    stmt = schema_stmt(stmt, model, schema, fields, sort_column, model.id)
+    page = await paginate(db, stmt, model.id, cursor, limit, rows=True,
+                          sort_column=sort_column, descending=descending)
+    return json_response({"next_cursor": page["next_cursor"], "items": row_dicts(page["items"], fields)})
+
+
+async def fast_list(db: AsyncSession, stmt: Select, model, schema: type[BaseModel],
+                    fields: list[str] | None = None) -> Response:
+    """
+    Быстрый вариант для списков без пагинации.
+    """
+    result = await db.execute(schema_stmt(stmt, model, schema, fields))
+    return json_response([row._asdict() for row in result])
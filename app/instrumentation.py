@@ -0,0 +1,106 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import DB_QUERY_DEBUG, DB_REPEATED_QUERY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestStats:
+    """
+    Статистика обращений к базе в рамках одного HTTP-запроса.
+    """
+    queries: int = 0
+    db_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+# Статистика текущего запроса; вне запроса (прогрев, миграции) хуки ничего не считают
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время начала хранится в контексте выполнения, а не на соединении: у упавшего запроса
+    # after_cursor_execute не вызывается, и запись на соединении из пула сбила бы все следующие замеры
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = context._query_started
+    stats = request_stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += time.perf_counter() - started
+    if DB_QUERY_DEBUG:
+        # Текст запроса с плейсхолдерами одинаков для всех значений параметров — это и есть его форма
+        stats.statements[statement] += 1
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Подключает к Engine хуки, считающие запросы и время в базе для текущего HTTP-запроса.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_path(scope) -> str:
+    # FastAPI кладёт найденный маршрут в scope; шаблон пути не раздувает логи и метрики идентификаторами
+    route = scope.get("route")
+    return getattr(route, "path", scope["path"])
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI-middleware: собирает статистику запросов к базе за время обработки HTTP-запроса,
+    добавляет её в заголовок Server-Timing и пишет итоговую строку в лог.
+    Заголовок отправляется вместе с началом ответа, поэтому у потоковых ответов он учитывает только
+    запросы до первого байта; строка лога — все запросы.
+    В режиме DB_QUERY_DEBUG предупреждает о запросах одной формы, выполненных больше
+    DB_REPEATED_QUERY_THRESHOLD раз (признак N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = (f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                          f"app;dur={total_ms:.2f}")
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            total_ms = (time.perf_counter() - started) * 1000
+            path = _route_path(scope)
+            logger.info("method=%s path=%s status=%s duration_ms=%.2f db_queries=%s db_ms=%.2f",
+                        scope["method"], path, status_code, total_ms, stats.queries, stats.db_time * 1000)
+            if DB_QUERY_DEBUG:
+                for statement, count in stats.statements.items():
+                    if count > DB_REPEATED_QUERY_THRESHOLD:
+                        logger.warning("Possible N+1: %s %s ran the same statement %s times: %s",
+                                       scope["method"], path, count, " ".join(statement.split())[:500])
@@ -1,18 +1,60 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.routers import categories, products, users, reviews
+from app.routers import categories, products, users, reviews, metrics
+from app import database
+from app.auth import hash_password_async
+from app.category_cache import category_cache
+from app.admission import AdmissionMiddleware
+from app.config import DB_WARMUP_CONNECTIONS, DB_INSTRUMENTATION, METRICS_ENABLED, ADMISSION_CONTROL
+from app.instrumentation import QueryStatsMiddleware
+from app.metrics import MetricsMiddleware
+from app.warmup import hot_statements, warm_up_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    При старте создаёт Engine, заранее открывает соединения пула и выполняет на них горячие запросы,
+    загружает бэкенд bcrypt и дерево категорий в кэш, чтобы первые запросы после деплоя не платили за это.
+    При остановке закрывает пулы соединений.
+    """
+    database.init_engines()
+    if DB_WARMUP_CONNECTIONS:
+        await warm_up_pool(database.async_engine, DB_WARMUP_CONNECTIONS, hot_statements())
+        if database.async_read_engine is not database.async_engine:
+            await warm_up_pool(database.async_read_engine, DB_WARMUP_CONNECTIONS, hot_statements())
+    # Первый вызов bcrypt загружает бэкенд passlib и запускает поток пула хеширования
+    await hash_password_async("warmup")
+    async with database.async_read_session_maker() as db:
+        await category_cache.load(db)
+    yield
+    await database.dispose_engines()
 
 
 # Создаём приложение FastAPI
 app = FastAPI(
     title="FastAPI Интернет-магазин",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+if ADMISSION_CONTROL:
+    # Внутри метрик: отказы 503 попадают в латентность и счётчики запросов
+    app.add_middleware(AdmissionMiddleware)
+if DB_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
+if METRICS_ENABLED:
+    # Добавленное последним middleware внешнее: в латентность попадает и работа QueryStatsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 # Корневой эндпоинт для проверки
 @app.get("/")
@@ -0,0 +1,247 @@
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Метрики меняются только из потока цикла событий, поэтому обходятся без блокировок
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Базовый класс метрики с метками: значения хранятся по кортежу значений меток.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def clear(self):
+        self._values.clear()
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}", *self._samples()]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин; корзины накапливаются при выводе.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Счётчики корзин (последняя — +Inf), сумма и количество наблюдений
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            samples.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            samples.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return samples
+
+
+class Registry:
+    """
+    Набор метрик процесса. Коллекторы вызываются перед выводом и обновляют метрики,
+    которые дешевле снять в момент запроса /metrics, чем отслеживать постоянно.
+    """
+
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed"))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template",
+    ("method", "route"), buckets=SIZE_BUCKETS))
+
+db_pool_size = registry.register(Gauge("db_pool_size", "Configured connection pool size", ("pool",)))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ("pool",)))
+db_pool_overflow = registry.register(Gauge(
+    "db_pool_overflow", "Overflow connections currently open beyond pool size", ("pool",)))
+db_pool_checkout_duration = registry.register(Histogram(
+    "db_pool_checkout_duration_seconds", "Time to get a connection from the pool", ("pool",)))
+db_pool_waits = registry.register(Counter(
+    "db_pool_waits_total", "Checkouts that had to wait because pool and overflow were exhausted", ("pool",)))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_timeouts_total", "Checkouts that failed with a pool timeout", ("pool",)))
+
+password_hash_duration = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify duration in the worker thread", ("operation",)))
+password_hash_rejected = registry.register(Counter(
+    "password_hash_rejected_total", "Password jobs rejected with 503 because the hashing queue was full"))
+
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight", "Requests admitted and being processed by route group", ("group",)))
+admission_queue_depth = registry.register(Gauge(
+    "admission_queue_depth", "Requests waiting for admission by route group", ("group",)))
+admission_wait_duration = registry.register(Histogram(
+    "admission_wait_seconds", "Time queued requests waited for admission", ("group",)))
+admission_shed = registry.register(Counter(
+    "admission_shed_total", "Requests rejected with 503 by admission control", ("group", "reason")))
+
+response_cache_requests = registry.register(Counter(
+    "response_cache_requests_total", "Response cache lookups by result", ("result",)))
+response_cache_hit_ratio = registry.register(Gauge(
+    "response_cache_hit_ratio", "Share of response cache lookups served from the cache"))
+response_cache_memory = registry.register(Gauge(
+    "response_cache_memory_bytes", "Bytes of keys and payloads held by the in-process response cache"))
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время выдачи соединения и ожидания свободного.
+    Метка pool берётся из pool_logging_name Engine и сохраняется при пересоздании пула.
+    """
+
+    def _do_get(self):
+        pool = self.logging_name or "default"
+        # Та же проверка, что в QueuePool._do_get: свободных соединений нет и overflow исчерпан
+        waits = self.checkedin() == 0 and -1 < self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc(pool=pool)
+            raise
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - started, pool=pool)
+            if waits:
+                db_pool_waits.inc(pool=pool)
+
+
+def collect_pool_stats(pools: dict):
+    """
+    Снимает текущее состояние пулов {метка: пул}; пулы без размера (StaticPool, NullPool) пропускаются.
+    """
+    for metric in (db_pool_size, db_pool_checked_out, db_pool_overflow):
+        metric.clear()
+    for name, pool in pools.items():
+        if not isinstance(pool, AsyncAdaptedQueuePool):
+            continue
+        db_pool_size.set(pool.size(), pool=name)
+        db_pool_checked_out.set(pool.checkedout(), pool=name)
+        db_pool_overflow.set(max(pool.overflow(), 0), pool=name)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: длительность, размер ответа и число одновременных запросов.
+    Маршрут определяется шаблоном пути FastAPI; запросы без маршрута (404) попадают в route="unmatched",
+    чтобы произвольные URL не раздували число временных рядов.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - started,
+                                          method=scope["method"], route=route, status=status_code)
+            http_response_size.observe(size, method=scope["method"], route=route)
@@ -8,10 +8,13 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from app.database import Base
+from app.config import DATABASE_URL
 from app import models
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# Строка подключения берётся из настроек приложения (DATABASE_URL), а не из alembic.ini
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -30,6 +33,17 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+# Объекты, которые есть только в PostgreSQL и намеренно не описаны в моделях
+POSTGRES_ONLY_OBJECTS = {"search_vector", "ix_products_search_vector"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping PostgreSQL-only objects."""
+    if reflected and compare_to is None and name in POSTGRES_ONLY_OBJECTS:
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -46,6 +60,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -55,7 +70,8 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata,
+                      include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,44 @@
+"""Add product listing indexes
+
+Revision ID: 24c78c449d8c
+Revises: 5c4dc2ef51a0
+Create Date: 2026-10-18 18:13:23.659018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24c78c449d8c'
+down_revision: Union[str, Sequence[str], None] = '5c4dc2ef51a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, колонки) — частичные индексы по активным товарам под фильтры и сортировки GET /products/
+INDEXES = [
+    ('ix_products_price_active', ['price', 'id']),
+    ('ix_products_rating_active', ['rating', 'id']),
+    ('ix_products_seller_id_active', ['seller_id', 'id']),
+    ('ix_products_category_price_active', ['category_id', 'price', 'id']),
+    ('ix_products_category_rating_active', ['category_id', 'rating', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицу, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'products', columns, unique=False,
+                            postgresql_where=sa.text('is_active'),
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='products', postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""Add indexes for active rows
+
+Revision ID: 6afe78803de5
+Revises: a84962b67525
+Create Date: 2026-10-18 17:51:28.178396
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6afe78803de5'
+down_revision: Union[str, Sequence[str], None] = 'a84962b67525'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя индекса, таблица, колонки) — все индексы частичные, только по активным строкам
+INDEXES = [
+    ('ix_products_active_id', 'products', ['id']),
+    ('ix_products_category_id_active', 'products', ['category_id', 'id']),
+    ('ix_reviews_active_id', 'reviews', ['id']),
+    ('ix_reviews_product_id_active', 'reviews', ['product_id', 'id']),
+    ('ix_categories_parent_id_active', 'categories', ['parent_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_where=sa.text('is_active'),
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,55 @@
+"""Add category materialized path
+
+Revision ID: 830d0bd14e77
+Revises: 6afe78803de5
+Create Date: 2026-10-18 17:52:11.533085
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '830d0bd14e77'
+down_revision: Union[str, Sequence[str], None] = '6afe78803de5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('path', sa.String(length=255), server_default='', nullable=False))
+    # Строим пути для существующего дерева одним рекурсивным запросом от корней вниз
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, id::text || '/' AS path
+            FROM categories
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, tree.path || c.id::text || '/'
+            FROM categories c
+            JOIN tree ON c.parent_id = tree.id
+        )
+        UPDATE categories
+        SET path = tree.path
+        FROM tree
+        WHERE categories.id = tree.id
+    """)
+    # Категории, недостижимые от корней (цикл по parent_id или потомки цикла), остались бы с пустым путём,
+    # а пустой префикс в LIKE совпадает с любым путём. Исправить такие данные может только человек
+    unreachable = op.get_bind().execute(sa.text("SELECT id FROM categories WHERE path = '' ORDER BY id")).scalars().all()
+    if unreachable:
+        raise RuntimeError(
+            "Categories not reachable from a root (parent_id cycle): "
+            f"{', '.join(map(str, unreachable))}. Fix their parent_id and rerun the migration."
+        )
+    op.create_index('ix_categories_path', 'categories', ['path'], unique=False,
+                    postgresql_ops={'path': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_categories_path', table_name='categories')
+    op.drop_column('categories', 'path')
@@ -0,0 +1,44 @@
+"""Add product rating aggregates
+
+Revision ID: a84962b67525
+Revises: d8d8e32efa9e
+Create Date: 2026-10-18 17:51:00.453534
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84962b67525'
+down_revision: Union[str, Sequence[str], None] = 'd8d8e32efa9e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('products', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    # Заполняем агрегаты для существующих товаров одним запросом по всем отзывам
+    op.execute("""
+        UPDATE products
+        SET rating_sum = agg.grade_sum,
+            rating_count = agg.grade_count,
+            rating = agg.grade_sum::float / agg.grade_count
+        FROM (
+            SELECT product_id, SUM(grade) AS grade_sum, COUNT(*) AS grade_count
+            FROM reviews
+            WHERE is_active
+            GROUP BY product_id
+        ) AS agg
+        WHERE products.id = agg.product_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'rating_count')
+    op.drop_column('products', 'rating_sum')
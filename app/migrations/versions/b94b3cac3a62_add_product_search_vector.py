@@ -0,0 +1,39 @@
+"""Add product search vector
+
+Revision ID: b94b3cac3a62
+Revises: 830d0bd14e77
+Create Date: 2026-10-18 17:55:23.555457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b94b3cac3a62'
+down_revision: Union[str, Sequence[str], None] = '830d0bd14e77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Генерируемая колонка поддерживается самим PostgreSQL при каждом INSERT/UPDATE товара.
+    # Совпадения в названии весят больше (A), чем в описании (B).
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+    op.drop_column('products', 'search_vector')
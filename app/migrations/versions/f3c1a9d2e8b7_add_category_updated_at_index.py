@@ -0,0 +1,32 @@
+"""Add category updated_at index
+
+Revision ID: f3c1a9d2e8b7
+Revises: e5a1c7d93b20
+Create Date: 2026-10-18 21:42:07.318562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c1a9d2e8b7'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c7d93b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # max(updated_at) для ETag GET /categories/ читается с края индекса
+    with op.get_context().autocommit_block():
+        op.create_index('ix_categories_updated_at', 'categories', ['updated_at'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_categories_updated_at', table_name='categories', postgresql_concurrently=True)
@@ -2,6 +2,7 @@ from .categories import Category
 from .products import Product
 from .users import User
 from .reviews import Review
+from .reservations import StockReservation
 
 
-__all__ = ["Category", "Product", "User", "Review"]
\ No newline at end of file
+__all__ = ["Category", "Product", "User", "Review", "StockReservation"]
\ No newline at end of file
@@ -1,18 +1,33 @@
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, text, func
 
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
-from app.database import Base
+from app.database import Base, utc_now
 
 class Category(Base):
     __tablename__ = 'categories'
+    __table_args__ = (
+        Index("ix_categories_parent_id_active", "parent_id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        # text_pattern_ops позволяет использовать индекс для поиска поддерева через LIKE 'prefix%'
+        Index("ix_categories_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+        # max(updated_at) для ETag GET /categories/ читается с края индекса, без обхода таблицы
+        Index("ix_categories_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     is_active: Mapped[bool] = mapped_column(default=True)
     parent_id: Mapped[int | None] = mapped_column(ForeignKey('categories.id'))
+    # Материализованный путь от корня: ID предков и самой категории, например "1/5/12/"
+    path: Mapped[str] = mapped_column(String(255), nullable=False, default='', server_default='')
+    # Версия увеличивается при каждом UPDATE строки и используется для ETag
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1', onupdate=text("version + 1"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now,
+                                                 server_default=func.now())
 
     products: Mapped[list['Product']] = relationship(
         "Product",
@@ -1,13 +1,34 @@
+from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, Boolean, Integer, Numeric
+from sqlalchemy import String, Boolean, Integer, Numeric, DateTime, Index, text, event, DDL, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship  # New
 from sqlalchemy import ForeignKey  # New
 
-from app.database import Base
+from app.database import Base, utc_now
 
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Частичные индексы под выборки активных товаров с keyset-пагинацией по id.
+        # SQLite использует частичный индекс, только если условие запроса совпадает с ним дословно,
+        # а SQLAlchemy сравнивает булевы колонки как is_active = 1
+        Index("ix_products_active_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_category_id_active", "category_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        # Фильтры и сортировки списка товаров: ключ сортировки, затем id для стабильного курсора
+        Index("ix_products_price_active", "price", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_rating_active", "rating", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_seller_id_active", "seller_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_category_price_active", "category_id", "price", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_category_rating_active", "category_id", "rating", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -19,7 +40,13 @@ class Product(Base):
     category_id: Mapped[int] = mapped_column(ForeignKey("categories.id"), nullable=False)  # New
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     rating: Mapped[float] = mapped_column(default=0.0, server_default='0')
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default='0')  # Сумма оценок активных отзывов
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')  # Количество активных отзывов
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Версия увеличивается при каждом UPDATE строки и используется для ETag
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1', onupdate=text("version + 1"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now,
+                                                 server_default=func.now())
 
     category: Mapped["Category"] = relationship(
         back_populates="products"
@@ -30,4 +57,27 @@ class Product(Base):
     )
     reviews: Mapped[list["Review"]] = relationship(
         back_populates="product",
-    )
\ No newline at end of file
+    )
+
+
+# В PostgreSQL полнотекстовый поиск идёт по колонке search_vector с GIN-индексом (см. миграции).
+# В SQLite (локально и в тестах) вместо неё создаётся FTS5-таблица, синхронизируемая триггерами.
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE products_fts USING fts5(name, description, content='products', content_rowid='id')",
+    """CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
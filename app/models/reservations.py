@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import String, Integer, DateTime, ForeignKey
+
+from sqlalchemy.orm import mapped_column, Mapped
+
+from app.database import Base
+
+
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # reserved -> released: условный UPDATE статуса возвращает резерв на склад ровно один раз
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="reserved")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
@@ -1,13 +1,19 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, text
 
-from app.database import Base
+from app.database import Base, utc_now
 from sqlalchemy.orm import mapped_column, Mapped, relationship
-from sqlalchemy import Text, DateTime
+from sqlalchemy import Text, DateTime, Integer, func
 from datetime import datetime
 from app.models import User
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_active_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_reviews_product_id_active", "product_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -16,6 +22,10 @@ class Review(Base):
     comment_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     grade: Mapped[int] = mapped_column()
     is_active: Mapped[bool] = mapped_column(default=True)
+    # Версия увеличивается при каждом UPDATE строки и используется для ETag
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1', onupdate=text("version + 1"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now,
+                                                 server_default=func.now())
 
     user: Mapped["User"] = relationship(
         back_populates="reviews",
@@ -0,0 +1,90 @@
+import base64
+import json
+import math
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*values) -> str:
+    """
+    Упаковывает значения ключа сортировки последней строки страницы в непрозрачный курсор.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 1) -> list:
+    """
+    Распаковывает курсор, полученный от клиента.
+    Возвращает список значений ключа сортировки длиной size, иначе отвечает 400.
+    """
+    invalid_cursor = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise invalid_cursor
+    if not isinstance(values, list) or len(values) != size:
+        raise invalid_cursor
+    return values
+
+
+def _sort_value(value, column):
+    """
+    Приводит значение ключа сортировки из курсора к типу колонки (Decimal для цены, float для рейтинга).
+    """
+    if isinstance(value, (bool, list, dict)) or value is None:
+        raise ValueError(value)
+    value = column.type.python_type(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return value
+
+
+def keyset_stmt(stmt: Select, id_column, cursor: str | None, limit: int,
+                sort_column=None, descending: bool = False) -> Select:
+    """
+    Запрос страницы: WHERE id > :cursor ORDER BY id LIMIT :limit + 1.
+    С sort_column сортирует по паре (sort_column, id) и сравнивает её с курсором как кортеж,
+    что совпадает с порядком составного индекса (sort_column, id); descending разворачивает порядок.
+    Лишняя строка показывает, есть ли следующая страница.
+    """
+    keys = [id_column] if sort_column is None else [sort_column, id_column]
+    if cursor is not None:
+        values = decode_cursor(cursor, len(keys))
+        if not isinstance(values[-1], int) or isinstance(values[-1], bool):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if sort_column is not None:
+            try:
+                values[0] = _sort_value(values[0], sort_column)
+            except (TypeError, ValueError, ArithmeticError):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if sort_column is None:
+            key, last = id_column, values[0]
+        else:
+            key, last = tuple_(*keys), tuple_(*values)
+        stmt = stmt.where(key < last if descending else key > last)
+
+    order_by = [column.desc() for column in keys] if descending else keys
+    return stmt.order_by(*order_by).limit(limit + 1)
+
+
+async def paginate(db: AsyncSession, stmt: Select, id_column, cursor: str | None, limit: int,
+                   rows: bool = False, sort_column=None, descending: bool = False) -> dict:
+    """
+    Keyset-пагинация по первичному ключу (или паре sort_column, id) запросом из keyset_stmt.
+    С rows=True возвращает строки результата вместо ORM-объектов.
+    """
+    keys = [id_column] if sort_column is None else [sort_column, id_column]
+    result = await db.execute(keyset_stmt(stmt, id_column, cursor, limit, sort_column, descending))
+    items = result.all() if rows else result.scalars().all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*(getattr(items[-1], column.key) for column in keys))
+    return {"items": items, "next_cursor": next_cursor}
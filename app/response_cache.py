@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import Request, Response
+
+from app.cache import TTLCache
+from app.conditional import etag_matches, not_modified, set_validators
+from app.config import (RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_SIZE,
+                        RESPONSE_CACHE_TTL, RESPONSE_CACHE_URL)
+from app.metrics import response_cache_requests
+
+logger = logging.getLogger(__name__)
+
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def product_reviews_key(product_id: int) -> str:
+    return f"product-reviews:{product_id}"
+
+
+@dataclass
+class CachedResponse:
+    """
+    Сериализованный JSON-ответ вместе с валидаторами для условных запросов.
+    """
+    body: bytes
+    etag: str
+    last_modified: datetime | None = None
+
+    def encode(self) -> bytes:
+        # Две строки заголовка и тело: ETag и дата не содержат переводов строк
+        last_modified = self.last_modified.isoformat() if self.last_modified is not None else ""
+        return f"{self.etag}\n{last_modified}\n".encode() + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedResponse":
+        etag, last_modified, body = data.split(b"\n", 2)
+        return cls(body, etag.decode(), datetime.fromisoformat(last_modified.decode()) if last_modified else None)
+
+    def to_response(self, request: Request) -> Response:
+        """
+        Ответ 304, если у клиента та же версия, иначе сохранённое тело с ETag и Last-Modified.
+        """
+        if etag_matches(request, self.etag):
+            return not_modified(self.etag, self.last_modified)
+        response = Response(self.body, media_type="application/json")
+        set_validators(response, self.etag, self.last_modified)
+        return response
+
+
+class CacheBackend:
+    """
+    Хранилище кэша ответов: ключи — строки, значения — байты.
+    """
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        raise NotImplementedError
+
+    async def set_many(self, items: dict[str, bytes]):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+    def memory_bytes(self) -> int | None:
+        """
+        Объём кэшированных данных, если бэкенд может его посчитать.
+        """
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """
+    LRU с TTL в памяти процесса. Объём считается по длине ключей и значений, без накладных расходов Python.
+    Инвалидация видна только текущему воркеру: остальные отдают старую версию не дольше TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, maxbytes: int | None = None):
+        self._cache = TTLCache(maxsize, ttl, sizeof=lambda key, value: len(key) + len(value), maxbytes=maxbytes)
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found = {}
+        for key in keys:
+            value = self._cache.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set_many(self, items: dict[str, bytes]):
+        for key, value in items.items():
+            self._cache.set(key, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    def memory_bytes(self) -> int:
+        return self._cache.bytes
+
+
+class RemoteBackend(CacheBackend):
+    """
+    Внешнее хранилище, общее для всех воркеров, через клиент с интерфейсом redis.asyncio
+    (mget, set с ex, delete). Ошибки хранилища не роняют запросы: чтение считается промахом,
+    неудавшаяся инвалидация ограничена TTL.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "ecommerce:"):
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        try:
+            values = await self.client.mget([self.prefix + key for key in keys])
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            return {}
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items: dict[str, bytes]):
+        try:
+            await asyncio.gather(*(self.client.set(self.prefix + key, value, ex=self.ttl)
+                                   for key, value in items.items()))
+        except Exception:
+            logger.warning("Response cache write failed", exc_info=True)
+
+    async def delete(self, *keys: str):
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            logger.warning("Response cache invalidation failed", exc_info=True)
+
+
+class LocalRemoteClient:
+    """
+    Замена клиента redis в памяти процесса с тем же подмножеством методов.
+    Позволяет проверить RemoteBackend без внешнего сервера.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[bytes, float]] = {}
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            item = self._data.get(key)
+            if item is not None and item[1] < now:
+                del self._data[key]
+                item = None
+            values.append(item[0] if item is not None else None)
+        return values
+
+    async def set(self, key: str, value: bytes, ex: int):
+        self._data[key] = (value, time.monotonic() + ex)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов поверх сменного бэкенда; без бэкенда ничего не хранит.
+    Записи обновляются или удаляются после коммита изменяющих запросов. Заполнение после чтения из базы
+    передаёт отметку read_started(), взятую до чтения: если с тех пор ключ записали или инвалидировали,
+    прочитанная версия могла устареть и не сохраняется. Отметки видны только своему воркеру,
+    поэтому гонку с записью в другом воркере по-прежнему ограничивает TTL.
+    """
+
+    def __init__(self, backend: CacheBackend | None, ttl: float = RESPONSE_CACHE_TTL,
+                 maxsize: int = RESPONSE_CACHE_SIZE):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Номер последней записи каждого ключа: как поколение в CategoryTreeCache, но по ключам
+        self._clock = 0
+        self._writes = TTLCache(maxsize, ttl)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get(self, key: str) -> CachedResponse | None:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: list[str]) -> dict[str, CachedResponse]:
+        if self.backend is None or not keys:
+            return {}
+        found = {key: CachedResponse.decode(value) for key, value in (await self.backend.get_many(keys)).items()}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        response_cache_requests.inc(len(found), result="hit")
+        response_cache_requests.inc(len(keys) - len(found), result="miss")
+        return found
+
+    def read_started(self) -> int:
+        """
+        Отметка начала чтения из базы для заполнения кэша через set(..., since=...).
+        """
+        return self._clock
+
+    def _record_writes(self, keys):
+        self._clock += 1
+        for key in keys:
+            self._writes.set(key, self._clock)
+
+    async def set(self, key: str, entry: CachedResponse, since: int | None = None):
+        await self.set_many({key: entry}, since)
+
+    async def set_many(self, entries: dict[str, CachedResponse], since: int | None = None):
+        """
+        Без since — запись после коммита, она вытесняет заполнения, начатые раньше.
+        С since — заполнение после чтения: ключи, записанные после отметки, пропускаются.
+        """
+        if self.backend is None or not entries:
+            return
+        if since is None:
+            self._record_writes(entries)
+        else:
+            entries = {key: entry for key, entry in entries.items() if (self._writes.get(key) or 0) <= since}
+            if not entries:
+                return
+        await self.backend.set_many({key: entry.encode() for key, entry in entries.items()})
+
+    async def invalidate(self, *keys: str):
+        if self.backend is not None and keys:
+            self._record_writes(keys)
+            await self.backend.delete(*keys)
+
+    async def invalidate_products(self, product_ids):
+        """
+        Удаляет карточки товаров и списки их отзывов: ETag списка отзывов строится из версии товара.
+        """
+        await self.invalidate(*(key for product_id in product_ids
+                                for key in (product_key(product_id), product_reviews_key(product_id))))
+
+    def stats(self) -> dict:
+        """
+        Попадания, промахи, доля попаданий и объём данных (None, если бэкенд его не знает).
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0,
+                "bytes": self.backend.memory_bytes() if self.backend is not None else 0}
+
+
+def create_backend(name: str) -> CacheBackend | None:
+    """
+    Бэкенд по названию из RESPONSE_CACHE_BACKEND: memory, redis, local-remote или none.
+    """
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryBackend(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES)
+    if name == "local-remote":
+        return RemoteBackend(LocalRemoteClient(), RESPONSE_CACHE_TTL)
+    if name == "redis":
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the redis package") from None
+        return RemoteBackend(Redis.from_url(RESPONSE_CACHE_URL), RESPONSE_CACHE_TTL)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name}")
+
+
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_BACKEND))
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, update, func, literal, or_
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.categories import Category as CategoryModel
-from app.schemas import Category as CategorySchema, CategoryCreate
-from app.db_depends import get_db
-from app.db_depends import get_async_db
+from app.schemas import Category as CategorySchema, CategoryCreate, CategoryPage, CategoryTree
+from app.db_depends import get_async_db, get_async_read_db
+from app.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.category_cache import category_cache
+from app.conditional import make_etag, etag_matches, set_validators, not_modified
+from app.fast_json import fast_page
+from app.config import FAST_JSON_RESPONSES
 
 
 # Создаём маршрутизатор с префиксом и тегом
@@ -16,22 +20,53 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=list[CategorySchema])
-async def get_all_categories(db: AsyncSession = Depends(get_async_db)):
+@router.get("/", response_model=CategoryPage)
+async def get_all_categories(
+    request: Request,
+    response: Response,
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """
-    Возвращает список всех категорий товаров.
+    Возвращает страницу активных категорий товаров, упорядоченных по ID.
+    Строки не удаляются физически, а каждая вставка и изменение записывают в updated_at текущее время,
+    поэтому пара (max(id), max(updated_at)) меняется при любой записи и служит версией таблицы.
+    Оба максимума читаются с края индексов, так что проверка не зависит от размера таблицы.
     """
-    result = await db.scalars(select(CategoryModel).where(CategoryModel.is_active == True))
-    categories = result.all()
-    return categories
+    # Отдельные подзапросы: с двумя агрегатами в одном SELECT SQLite не применяет оптимизацию min/max
+    state = (await db.execute(select(select(func.max(CategoryModel.id)).scalar_subquery(),
+                                     select(func.max(CategoryModel.updated_at)).scalar_subquery()))).one()
+    etag = make_etag("categories", state[0], state[1], cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag, state[1])
+
+    stmt = select(CategoryModel).where(CategoryModel.is_active == True)
+    if FAST_JSON_RESPONSES:
+        page_response = await fast_page(db, stmt, CategoryModel, CategorySchema, cursor, limit)
+        set_validators(page_response, etag, state[1])
+        return page_response
+    set_validators(response, etag, state[1])
+    return await paginate(db, stmt, CategoryModel.id, cursor, limit)
+
+
+@router.get("/tree", response_model=list[CategoryTree])
+async def get_category_tree(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Возвращает дерево активных категорий из кэша в памяти процесса.
+    """
+    return await category_cache.get_tree(db)
+
+
 @router.post("/", response_model=CategorySchema, status_code=status.HTTP_201_CREATED)
 async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
     '''
     Создаёт новую категорию.
     '''
+    parent = None
     if category.parent_id is not None:
         stmt = select(CategoryModel).where(CategoryModel.id == category.parent_id,
-                                           CategoryModel.is_active==True)
+                                           CategoryModel.is_active==True, CategoryModel.path != "")
         result = await db.scalars(stmt)
         parent = result.first()
         if parent is None:
@@ -39,42 +74,71 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
 
     db_category = CategoryModel(**category.model_dump())
     db.add(db_category)
+    await db.flush()  # Получаем id, чтобы построить путь категории
+    db_category.path = f"{parent.path if parent else ''}{db_category.id}/"
     await db.commit()
+    category_cache.invalidate()
     await db.refresh(db_category)
     return db_category
 
+def _path_of(category_id: int):
+    """
+    Подзапрос пути категории. Через алиас, чтобы внутри UPDATE той же таблицы
+    он не коррелировал с обновляемой строкой.
+    Пустой путь дал бы префикс LIKE '%', совпадающий со всеми категориями, поэтому для него подзапрос
+    возвращает NULL и LIKE не находит ни одной строки.
+    """
+    category = aliased(CategoryModel)
+    return (select(category.path)
+            .where(category.id == category_id, category.is_active == True, category.path != "")
+            .scalar_subquery())
+
+
 @router.put("/{category_id}", response_model=CategorySchema)
 async def update_category(category_id: int, category: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Обновляет категорию по её ID.
     """
-    # Проверяем существование категории
-    stmt = select(CategoryModel).where(CategoryModel.id == category_id,
-                                       CategoryModel.is_active == True)
-    result = await db.scalars(stmt)
-    db_category = result.first()
-    if not db_category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    update_data = category.model_dump(exclude_unset=True)
 
     # Проверяем parent_id, если указан
-    if category.parent_id is not None:
-        parent_stmt = select(CategoryModel).where(CategoryModel.id == category.parent_id,
-                                                  CategoryModel.is_active == True)
-        parent_result = await db.scalars(parent_stmt)
-        parent = parent_result.first()
-        if not parent:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parent category not found")
-        if parent.id == category_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category cannot be its own parent")
-
-    # Обновляем категорию
-    update_data = category.model_dump(exclude_unset=True)
-    await db.execute(
+    if "parent_id" in update_data:
+        parent_path = ""
+        if category.parent_id is not None:
+            if category.parent_id == category_id:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Category cannot be its own parent")
+            parent_path = await db.scalar(select(CategoryModel.path).where(CategoryModel.id == category.parent_id,
+                                                                           CategoryModel.is_active == True,
+                                                                           CategoryModel.path != ""))
+            if parent_path is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parent category not found")
+            # Путь состоит из id предков, так что категория есть в пути родителя, только если он в её поддереве
+            if str(category_id) in parent_path.split("/"):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Category cannot be moved into its own subtree")
+
+        # Переносим путь категории и всего поддерева одним запросом; старый путь читается подзапросом,
+        # а если родитель не изменился, условие на старый путь не находит строк и версии не растут
+        old_path, new_path = _path_of(category_id), f"{parent_path}{category_id}/"
+        await db.execute(
+            update(CategoryModel)
+            .where(CategoryModel.path.like(old_path + "%"), old_path != new_path)
+            .values(path=literal(new_path) + func.substr(CategoryModel.path, func.length(old_path) + 1))
+            .execution_options(synchronize_session=False)
+        )
+
+    # Активность проверяется в WHERE, ответ строится из RETURNING
+    db_category = await db.scalar(
         update(CategoryModel)
-        .where(CategoryModel.id == category_id)
+        .where(CategoryModel.id == category_id, CategoryModel.is_active == True)
         .values(**update_data)
+        .returning(CategoryModel)
     )
+    if db_category is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     await db.commit()
+    category_cache.invalidate()
     return db_category
 
 
@@ -83,20 +147,19 @@ async def delete_category(category_id: int, db: AsyncSession = Depends(get_async
     """
     Выполняет мягкое удаление категории по её ID, устанавливая is_active = False.
     """
-    stmt = select(CategoryModel).where(CategoryModel.id == category_id,
-                                       CategoryModel.is_active == True)
-    result = await db.scalars(stmt)
-    db_category = result.first()
-    if not db_category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-
-    await db.execute(
+    # Вместе с категорией скрываем всё её поддерево, чтобы в нём не оставалось активных «сирот».
+    # Путь категории читается подзапросом, так что проверка и удаление — один запрос.
+    # Категория без пути удаляется одна: её поддерево по пути не найти
+    result = await db.scalars(
         update(CategoryModel)
-        .where(CategoryModel.id == category_id)
+        .where(or_(CategoryModel.id == category_id, CategoryModel.path.like(_path_of(category_id) + "%")),
+               CategoryModel.is_active == True)
         .values(is_active=False)
+        .returning(CategoryModel)
     )
+    db_category = next((row for row in result if row.id == category_id), None)
+    if not db_category:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     await db.commit()
+    category_cache.invalidate()
     return db_category
-
-
-
@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import database
+from app.metrics import registry, collect_pool_stats, response_cache_hit_ratio, response_cache_memory
+from app.response_cache import response_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+def _collect_database_pools():
+    pools = {}
+    if database.async_engine is not None:
+        pools["primary"] = database.async_engine.pool
+    if database.async_read_engine is not None and database.async_read_engine is not database.async_engine:
+        pools["replica"] = database.async_read_engine.pool
+    collect_pool_stats(pools)
+
+
+def _collect_response_cache():
+    stats = response_cache.stats()
+    response_cache_hit_ratio.set(stats["hit_ratio"])
+    # Объём внешнего хранилища снимается его собственными средствами
+    if stats["bytes"] is not None:
+        response_cache_memory.set(stats["bytes"])
+
+
+registry.add_collector(_collect_database_pools)
+registry.add_collector(_collect_response_cache)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Метрики процесса в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,14 +1,32 @@
-from fastapi import APIRouter, status, Depends, HTTPException
-from sqlalchemy import select, update
+from decimal import Decimal
+
+from fastapi import APIRouter, status, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy import Integer, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db_depends import get_async_db
-from app.schemas import Product as ProductSchema, ProductCreate
+from app.db_depends import get_async_db, get_async_read_db
+from app.database import async_read_session_maker
+from app.schemas import Product as ProductSchema, ProductCreate, ProductPage, BulkImportReport
+from app.schemas import ProductBatch, ProductBatchRequest, StockRequest, StockLevel, StockReleaseRequest
+from app.schemas import StockReservation, ProductFields, ProductFieldsPage, ProductFieldsBatch
 from app.models import Category as CategoryModel, Product as ProductModel
-from app.models import User as UserModel
-from app.auth import get_current_seller
+from app.auth import CurrentUser, get_current_seller, get_current_buyer
 from app.schemas import Review as ReviewSchema, ReviewCreate
 from app.models import Review as ReviewModel
+from app.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.category_cache import category_cache
+from app.search import search_products
+from app.bulk_import import import_products, iter_ndjson_rows, iter_csv_rows
+from app.export import export_products
+from app.stock import reserve_stock, release_stock
+from app.conditional import make_etag, etag_matches, set_validators, not_modified
+from app.fast_json import fast_page, fast_list, json_response, schema_columns, sparse_fields, with_keys, row_dicts
+from app.response_cache import CachedResponse, response_cache, product_key, product_reviews_key
+from app.single_flight import single_flight
+from app.config import FAST_JSON_RESPONSES, PRODUCT_BATCH_MAX_IDS, SINGLE_FLIGHT_ENABLED
 
 # Создаём маршрутизатор для товаров
 router = APIRouter(
@@ -17,28 +35,101 @@ router = APIRouter(
 )
 
 
-@router.get("/",response_model=list[ProductSchema])
-async def get_all_products(db: AsyncSession = Depends(get_async_db)):
+def active_products_stmt():
+    return select(ProductModel).where(ProductModel.is_active == True)
+
+
+def active_product_stmt(product_id: int):
+    return select(ProductModel).where(ProductModel.is_active == True, ProductModel.id == product_id)
+
+
+def product_version_stmt(product_id: int):
+    return (select(ProductModel.version, ProductModel.updated_at)
+            .where(ProductModel.is_active == True, ProductModel.id == product_id))
+
+
+def active_category_stmt(category_id: int):
+    return select(CategoryModel).where(CategoryModel.id == category_id, CategoryModel.is_active == True)
+
+
+def category_products_stmt(category_id: int, path: str | None = None):
     """
-    Возвращает список всех товаров.
+    Активные товары категории, а с непустым path — всего её поддерева по префиксу материализованного пути.
     """
-    stmt = await db.scalars(select(ProductModel).where(ProductModel.is_active==True))
-    result = stmt.all()
-    return result
+    # Пустой путь (категория вне дерева) совпал бы как префикс со всем каталогом
+    if path:
+        subtree_ids = select(CategoryModel.id).where(CategoryModel.path.like(f"{path}%"),
+                                                     CategoryModel.path != "", CategoryModel.is_active == True)
+        return active_products_stmt().where(ProductModel.category_id.in_(subtree_ids))
+    return active_products_stmt().where(ProductModel.category_id == category_id)
+
+
+def product_reviews_stmt(product_id: int):
+    return select(ReviewModel).where(ReviewModel.is_active == True, ReviewModel.product_id == product_id)
+
+
+# Сортировки списка товаров: колонка перед id в ключе курсора (None — только id) и направление
+PRODUCT_SORTS = {
+    "id": (None, False),
+    "newest": (None, True),
+    "price_asc": (ProductModel.price, False),
+    "price_desc": (ProductModel.price, True),
+    "rating_desc": (ProductModel.rating, True),
+}
+
+
+@router.get("/", response_model=ProductPage | ProductFieldsPage)
+async def get_all_products(
+    min_price: Decimal | None = Query(None, ge=0, description="Минимальная цена"),
+    max_price: Decimal | None = Query(None, ge=0, description="Максимальная цена"),
+    in_stock: bool = Query(False, description="Только товары в наличии"),
+    min_rating: float | None = Query(None, ge=0, le=5, description="Минимальный рейтинг"),
+    category_id: int | None = Query(None, description="ID категории (без подкатегорий)"),
+    seller_id: int | None = Query(None, description="ID продавца"),
+    sort: str = Query("id", pattern=f"^({'|'.join(PRODUCT_SORTS)})$",
+                      description="Сортировка: id, newest, price_asc, price_desc или rating_desc"),
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Возвращает страницу активных товаров с фильтрами по цене, наличию, рейтингу, категории и продавцу.
+    Каждой сортировке соответствует частичный индекс (ключ, id), поэтому страница читается диапазоном индекса.
+    Курсор привязан к сортировке: при её смене пагинацию нужно начинать заново.
+    С fields из базы читаются и в ответ попадают только перечисленные поля.
+    """
+    stmt = active_products_stmt()
+    if min_price is not None:
+        stmt = stmt.where(ProductModel.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(ProductModel.price <= max_price)
+    if in_stock:
+        stmt = stmt.where(ProductModel.stock > 0)
+    if min_rating is not None:
+        stmt = stmt.where(ProductModel.rating >= min_rating)
+    if category_id is not None:
+        stmt = stmt.where(ProductModel.category_id == category_id)
+    if seller_id is not None:
+        stmt = stmt.where(ProductModel.seller_id == seller_id)
+
+    sort_column, descending = PRODUCT_SORTS[sort]
+    if FAST_JSON_RESPONSES or fields:
+        return await fast_page(db, stmt, ProductModel, ProductSchema, cursor, limit,
+                               sort_column=sort_column, descending=descending, fields=fields)
+    return await paginate(db, stmt, ProductModel.id, cursor, limit,
+                          sort_column=sort_column, descending=descending)
 
 @router.post("/", response_model=ProductSchema, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_seller)
+    current_user: CurrentUser = Depends(get_current_seller)
 ):
     """
     Создаёт новый товар, привязанный к текущему продавцу (только для 'seller').
     """
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
-    )
-    if not category_result.first():
+    if not await category_cache.is_active(db, product.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
     db_product = ProductModel(**product.model_dump(), seller_id=current_user.id)
     db.add(db_product)
@@ -47,100 +138,388 @@ async def create_product(
     return db_product
 
 
-@router.get("/category/{category_id}", response_model=list[ProductSchema], status_code=status.HTTP_200_OK)
-async def get_products_by_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+@router.post(
+    "/bulk",
+    response_model=BulkImportReport,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": {"type": "string"}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def bulk_create_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_seller)
+):
+    """
+    Массово создаёт товары текущего продавца из NDJSON или CSV (только для 'seller').
+    Тело читается потоком и вставляется пачками, в ответе — отчёт с ошибками по строкам.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json"):
+        rows = iter_ndjson_rows(request.stream())
+    elif content_type == "text/csv":
+        rows = iter_csv_rows(request.stream())
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Use application/x-ndjson or text/csv")
+    return await import_products(db, rows, current_user.id)
+
+
+@router.post("/stock/reserve", response_model=list[StockReservation])
+async def reserve_products_stock(
+    stock: StockRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_buyer)
+):
     """
-    Возвращает список товаров в указанной категории по её ID.
+    Резервирует остатки нескольких товаров при оформлении заказа (только для 'buyer').
+    Все позиции списываются одним условным UPDATE; если хоть одной не хватает, ничего не списывается (409).
+    В ответе — ID резерва каждого товара для последующего возврата.
     """
-    category_stmt = await db.scalar(select(CategoryModel).where(CategoryModel.id == category_id,
-                                                CategoryModel.is_active==True))
+    return await reserve_stock(db, stock.items, current_user.id)
+
+
+@router.post("/stock/release", response_model=list[StockLevel])
+async def release_products_stock(
+    release: StockReleaseRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_buyer)
+):
+    """
+    Возвращает на склад свои резервы по их ID (только для 'buyer').
+    Каждый резерв возвращается один раз и ровно в зарезервированном количестве.
+    """
+    return await release_stock(db, release.reservation_ids, current_user.id)
+
+
+@router.get("/category/{category_id}", response_model=ProductPage | ProductFieldsPage, status_code=status.HTTP_200_OK)
+async def get_products_by_category(
+    category_id: int,
+    include_descendants: bool = Query(False, description="Включить товары из всех подкатегорий"),
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Возвращает страницу товаров в указанной категории по её ID.
+    С include_descendants=true в выборку попадают и товары всех активных подкатегорий.
+    Одновременные запросы одной и той же страницы выполняются в базе один раз и получают общий ответ.
+    """
+    if SINGLE_FLIGHT_ENABLED:
+        key = ("products-by-category", category_id, include_descendants, cursor, limit, tuple(fields or ()))
+        body = await single_flight.do(key, lambda: _load_category_page(category_id, include_descendants,
+                                                                       cursor, limit, fields))
+        return Response(body, media_type="application/json")
+
+    product_stmt = await _category_products_stmt(db, category_id, include_descendants)
+    if FAST_JSON_RESPONSES or fields:
+        return await fast_page(db, product_stmt, ProductModel, ProductSchema, cursor, limit, fields=fields)
+    return await paginate(db, product_stmt, ProductModel.id, cursor, limit)
+
+
+async def _category_products_stmt(db: AsyncSession, category_id: int, include_descendants: bool):
+    category_stmt = await db.scalar(active_category_stmt(category_id))
 
     if category_stmt is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Category not found")
-    product_stmt = select(ProductModel).where(ProductModel.is_active==True,
-                                              ProductModel.category_id==category_id)
-    product_result = await db.scalars(product_stmt)
-    products = product_result.all()
-    return products
+    return category_products_stmt(category_id, category_stmt.path if include_descendants else None)
+
+
+async def _load_category_page(category_id: int, include_descendants: bool, cursor: str | None, limit: int,
+                              fields: list[str] | None) -> bytes:
+    """
+    Общий для одновременных запросов вызов: собственная сессия и готовое тело ответа.
+    """
+    async with async_read_session_maker() as db:
+        product_stmt = await _category_products_stmt(db, category_id, include_descendants)
+        return (await fast_page(db, product_stmt, ProductModel, ProductSchema, cursor, limit, fields=fields)).body
+
+
+@router.get("/search", response_model=ProductPage | ProductFieldsPage)
+async def search(
+    q: str = Query(min_length=1, max_length=200, description="Поисковый запрос по названию и описанию"),
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Ищет активные товары по названию и описанию, самые релевантные — первыми.
+    """
+    if fields:
+        return json_response(await search_products(db, q, cursor, limit, fields))
+    return await search_products(db, q, cursor, limit)
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export_catalog(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Формат выгрузки: ndjson или csv"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Потоково выгружает весь каталог активных товаров в NDJSON или CSV.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_products(db, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+
+def _ids_filter(db: AsyncSession, ids: list[int]):
+    if db.bind.dialect.name == "postgresql":
+        # Массив в одном параметре: текст запроса не зависит от числа ID и переиспользует подготовленное выражение
+        return ProductModel.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    return ProductModel.id.in_(ids)
+
+
+async def _get_cached_products_batch(db: AsyncSession, ids: list[int]) -> Response:
+    """
+    Вариант с кэшем ответов: найденные в кэше карточки берутся готовыми байтами, остальные читаются
+    одним запросом и кладутся в кэш. Ответ склеивается из тел карточек без повторной сериализации.
+    """
+    cached = await response_cache.get_many([product_key(product_id) for product_id in ids])
+    bodies = {product_id: cached[product_key(product_id)].body for product_id in ids
+              if product_key(product_id) in cached}
+    missed = [product_id for product_id in ids if product_id not in bodies]
+    if missed:
+        since = response_cache.read_started()
+        stmt = (select(*schema_columns(ProductModel, ProductSchema), ProductModel.version, ProductModel.updated_at)
+                .where(_ids_filter(db, missed), ProductModel.is_active == True))
+        entries = {}
+        for row in await db.execute(stmt):
+            fields = row._asdict()
+            version, updated_at = fields.pop("version"), fields.pop("updated_at")
+            entry = CachedResponse(to_json(fields), make_etag("product", row.id, version), updated_at)
+            entries[product_key(row.id)] = entry
+            bodies[row.id] = entry.body
+        await response_cache.set_many(entries, since)
+    items = b",".join(bodies[product_id] for product_id in ids if product_id in bodies)
+    missing = to_json([product_id for product_id in ids if product_id not in bodies])
+    return Response(b'{"items":[' + items + b'],"missing":' + missing + b"}", media_type="application/json")
+
+
+async def _get_products_batch(db: AsyncSession, ids: list[int], fields: list[str] | None = None):
+    """
+    Загружает активные товары по списку ID одним запросом и раскладывает их в порядке запроса.
+    Повторяющиеся ID учитываются один раз. Кэш ответов хранит полные карточки, поэтому с fields не используется.
+    """
+    ids = list(dict.fromkeys(ids))
+    if response_cache.enabled and not fields:
+        return await _get_cached_products_batch(db, ids)
+    stmt = (select(*with_keys(schema_columns(ProductModel, ProductSchema, fields), ProductModel.id))
+            .where(_ids_filter(db, ids), ProductModel.is_active == True))
+    rows = (await db.execute(stmt)).all()
+    found = {row.id: item for row, item in zip(rows, row_dicts(rows, fields or list(ProductSchema.model_fields)))}
+    page = {"items": [found[product_id] for product_id in ids if product_id in found],
+            "missing": [product_id for product_id in ids if product_id not in found]}
+    return json_response(page) if FAST_JSON_RESPONSES or fields else page
+
+
+@router.get("/batch", response_model=ProductBatch | ProductFieldsBatch)
+async def get_products_batch(
+    ids: list[int] = Query(min_length=1, max_length=PRODUCT_BATCH_MAX_IDS,
+                           description="ID товаров, параметр повторяется: ?ids=1&ids=2"),
+    fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Возвращает несколько товаров по списку ID в порядке запроса и список ненайденных ID.
+    """
+    return await _get_products_batch(db, ids, fields)
+
+
+@router.post("/batch", response_model=ProductBatch | ProductFieldsBatch)
+async def post_products_batch(batch: ProductBatchRequest,
+                              fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+                              db: AsyncSession = Depends(get_async_read_db)):
+    """
+    То же, что GET /products/batch, для списков, которые не помещаются в URL.
+    """
+    return await _get_products_batch(db, batch.ids, fields)
+
 
-@router.get("/{product_id}", response_model=ProductSchema, status_code=status.HTTP_200_OK)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+@router.get("/{product_id}", response_model=ProductSchema | ProductFields, status_code=status.HTTP_200_OK)
+async def get_product(product_id: int, request: Request, response: Response,
+                      fields: list[str] | None = Depends(sparse_fields(ProductSchema)),
+                      db: AsyncSession = Depends(get_async_read_db)):
     """
     Возвращает детальную информацию о товаре по его ID.
+    Поддерживает условный запрос: при совпадении If-None-Match отвечает 304, проверив только версию товара.
+    Карточка из кэша ответов отдаётся без обращения к базе: сессия не берёт соединение из пула до первого запроса.
     """
-    product_stmt = await db.scalar(select(ProductModel).where(ProductModel.is_active==True,
-                                      ProductModel.id == product_id))
+    if fields:
+        return await _get_product_fields(db, request, product_id, fields)
+    cached = await response_cache.get(product_key(product_id))
+    if cached is not None:
+        return cached.to_response(request)
+    if SINGLE_FLIGHT_ENABLED:
+        # Одновременные промахи по одной карточке читают товар из базы один раз
+        entry = await single_flight.do(product_key(product_id), lambda: _load_product_entry(product_id))
+        if entry is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return entry.to_response(request)
+
+    since = response_cache.read_started()
+    if request.headers.get("if-none-match"):
+        version = (await db.execute(product_version_stmt(product_id))).first()
+        if version is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Product not found")
+        etag = make_etag("product", product_id, version.version)
+        if etag_matches(request, etag):
+            return not_modified(etag, version.updated_at)
+
+    product_stmt = await db.scalar(active_product_stmt(product_id))
 
     if product_stmt is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Product not found")
+    if response_cache.enabled:
+        entry = _product_entry(product_stmt)
+        # Чтение, начатое до коммита update_product, не должно затереть его свежую карточку
+        await response_cache.set(product_key(product_id), entry, since)
+        return entry.to_response(request)
+    set_validators(response, make_etag("product", product_id, product_stmt.version), product_stmt.updated_at)
     return product_stmt
 
 
+def _product_entry(product: ProductModel) -> CachedResponse:
+    """
+    Запись кэша ответов для карточки товара; тело совпадает с ответом по response_model.
+    """
+    return CachedResponse(to_json(ProductSchema.model_validate(product)),
+                          make_etag("product", product.id, product.version), product.updated_at)
+
+
+async def _get_product_fields(db: AsyncSession, request: Request, product_id: int, fields: list[str]) -> Response:
+    """
+    Карточка только с полями fields: читает из базы эти колонки и версию, ETag зависит и от набора полей.
+    """
+    row = (await db.execute(select(*schema_columns(ProductModel, ProductSchema, fields),
+                                   ProductModel.version, ProductModel.updated_at)
+                            .where(ProductModel.is_active == True, ProductModel.id == product_id))).first()
+    if row is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Product not found")
+    etag = make_etag("product", product_id, row.version, *fields)
+    if etag_matches(request, etag):
+        return not_modified(etag, row.updated_at)
+    product_response = json_response(row_dicts([row], fields)[0])
+    set_validators(product_response, etag, row.updated_at)
+    return product_response
+
+
+async def _load_product_entry(product_id: int) -> CachedResponse | None:
+    """
+    Общий для одновременных запросов вызов: читает товар в собственной сессии и кладёт карточку в кэш ответов.
+    """
+    since = response_cache.read_started()
+    async with async_read_session_maker() as db:
+        product = await db.scalar(active_product_stmt(product_id))
+    if product is None:
+        return None
+    entry = _product_entry(product)
+    await response_cache.set(product_key(product_id), entry, since)
+    return entry
+
+
+async def _owned_product_error(db: AsyncSession, product_id: int, not_found: str, forbidden: str) -> HTTPException:
+    """
+    Объясняет, почему условный UPDATE не затронул товар: его нет (404) или он чужой (403).
+    Выполняется только на пути ошибки.
+    """
+    seller_id = await db.scalar(select(ProductModel.seller_id).where(ProductModel.id == product_id,
+                                                                     ProductModel.is_active == True))
+    if seller_id is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden)
+
+
 @router.put("/{product_id}", response_model=ProductSchema)
 async def update_product(
     product_id: int,
     product: ProductCreate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_seller)
+    current_user: CurrentUser = Depends(get_current_seller)
 ):
     """
     Обновляет товар, если он принадлежит текущему продавцу (только для 'seller').
     """
-    result = await db.scalars(select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True))
-    db_product = result.first()
-    if not db_product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    if db_product.seller_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only update your own products")
-    category_result = await db.scalars(
-        select(CategoryModel).where(CategoryModel.id == product.category_id, CategoryModel.is_active == True)
-    )
-    if not category_result.first():
+    if not await category_cache.is_active(db, product.category_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found or inactive")
-    await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(**product.model_dump())
+    # Проверки активности и владельца — в WHERE, ответ строится из RETURNING: один запрос к базе без гонки
+    db_product = await db.scalar(
+        update(ProductModel)
+        .where(ProductModel.id == product_id, ProductModel.is_active == True,
+               ProductModel.seller_id == current_user.id)
+        .values(**product.model_dump())
+        .returning(ProductModel)
     )
+    if db_product is None:
+        raise await _owned_product_error(db, product_id, "Product not found", "You can only update your own products")
     await db.commit()
-    await db.refresh(db_product)  # Для консистентности данных
+    # RETURNING вернул новую версию товара: карточку в кэше можно сразу обновить, а не только удалить
+    await response_cache.set(product_key(product_id), _product_entry(db_product))
+    await response_cache.invalidate(product_reviews_key(product_id))
     return db_product
 
 @router.delete("/{product_id}", response_model=ProductSchema)
 async def delete_product(
     product_id: int,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_seller)
+    current_user: CurrentUser = Depends(get_current_seller)
 ):
     """
     Выполняет мягкое удаление товара, если он принадлежит текущему продавцу (только для 'seller').
     """
-    result = await db.scalars(
-        select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True)
-    )
-    product = result.first()
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or inactive")
-    if product.seller_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only delete your own products")
-    await db.execute(
-        update(ProductModel).where(ProductModel.id == product_id).values(is_active=False)
+    product = await db.scalar(
+        update(ProductModel)
+        .where(ProductModel.id == product_id, ProductModel.is_active == True,
+               ProductModel.seller_id == current_user.id)
+        .values(is_active=False)
+        .returning(ProductModel)
     )
+    if product is None:
+        raise await _owned_product_error(db, product_id, "Product not found or inactive",
+                                         "You can only delete your own products")
     await db.commit()
-    await db.refresh(product)  # Для возврата is_active = False
+    await response_cache.invalidate_products([product_id])
     return product
 
 @router.get("/{product_id}/reviews", response_model=list[ReviewSchema])
-async def get_reviews_for_products(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_reviews_for_products(product_id: int, request: Request, response: Response,
+                                   fields: list[str] | None = Depends(sparse_fields(ReviewSchema)),
+                                   db: AsyncSession = Depends(get_async_read_db)):
     """
     Возвращает все отзывы о товаре по ID товара.
+    Каждое добавление и удаление отзыва пересчитывает рейтинг товара и увеличивает его версию,
+    поэтому версия товара служит и версией списка его отзывов.
     """
-    db_product = await db.scalar(select(ProductModel).where(ProductModel.is_active == True,
-                                                               ProductModel.id == product_id))
+    key = product_reviews_key(product_id)
+    cached = await response_cache.get(key) if not fields else None
+    if cached is not None:
+        return cached.to_response(request)
+
+    since = response_cache.read_started()
+    db_product = (await db.execute(product_version_stmt(product_id))).first()
     if not db_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    etag = make_etag("product-reviews", product_id, db_product.version, *(fields or ()))
+    if etag_matches(request, etag):
+        return not_modified(etag, db_product.updated_at)
 
-    result = await db.scalars(select(ReviewModel).where(ReviewModel.is_active == True,
-                                                        ReviewModel.product_id == product_id))
+    reviews_stmt = product_reviews_stmt(product_id)
+    if response_cache.enabled and not fields:
+        entry = CachedResponse((await fast_list(db, reviews_stmt, ReviewModel, ReviewSchema)).body,
+                               etag, db_product.updated_at)
+        await response_cache.set(key, entry, since)
+        return entry.to_response(request)
+    if FAST_JSON_RESPONSES or fields:
+        list_response = await fast_list(db, reviews_stmt, ReviewModel, ReviewSchema, fields)
+        set_validators(list_response, etag, db_product.updated_at)
+        return list_response
 
+    result = await db.scalars(reviews_stmt)
+    set_validators(response, etag, db_product.updated_at)
     return result.all()
\ No newline at end of file
@@ -1,31 +1,42 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Query
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db_depends import get_async_db
-from app.schemas import Review as ReviewSchema, ReviewCreate
-from app.auth import get_current_user, get_current_buyer, check_admin
+from app.db_depends import get_async_db, get_async_read_db
+from app.schemas import Review as ReviewSchema, ReviewCreate, ReviewPage, ReviewFieldsPage
+from app.auth import CurrentUser, get_current_user, get_current_buyer, check_admin
 from app.models import Review as ReviewModel
-from app.models import User as UserModel, Product as ProductModel
+from app.models import Product as ProductModel
 from app.utils import update_avg_rating
+from app.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.fast_json import fast_page, sparse_fields
+from app.config import FAST_JSON_RESPONSES
+from app.response_cache import response_cache
 
 router = APIRouter(tags=["reviews"],
                    prefix="/reviews")
 
-@router.get("/", response_model=list[ReviewSchema])
-async def get_reviews(db: AsyncSession = Depends(get_async_db)):
+@router.get("/", response_model=ReviewPage | ReviewFieldsPage)
+async def get_reviews(
+    cursor: str | None = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    fields: list[str] | None = Depends(sparse_fields(ReviewSchema)),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """
-    Эндпоинт для получения всех отзывов.
+    Эндпоинт для получения страницы активных отзывов, упорядоченных по ID.
+    С fields из базы читаются и в ответ попадают только перечисленные поля.
     """
-    stmt = await db.scalars(select(ReviewModel).where(ReviewModel.is_active == True))
-
-    return stmt.all()
+    stmt = select(ReviewModel).where(ReviewModel.is_active == True)
+    if FAST_JSON_RESPONSES or fields:
+        return await fast_page(db, stmt, ReviewModel, ReviewSchema, cursor, limit, fields=fields)
+    return await paginate(db, stmt, ReviewModel.id, cursor, limit)
 
 @router.post("/", response_model=ReviewSchema)
 
 async def create_review(
         review: ReviewCreate,
-        user: UserModel = Depends(get_current_buyer),
+        user: CurrentUser = Depends(get_current_buyer),
         db: AsyncSession = Depends(get_async_db)
 ):
     """
@@ -39,26 +50,31 @@ async def create_review(
 
     new_review = ReviewModel(**review.model_dump(), user_id = user.id)
     db.add(new_review)
-    await update_avg_rating(review.product_id, db)
+    await update_avg_rating(review.product_id, review.grade, 1, db)
     await db.commit()
+    await response_cache.invalidate_products([review.product_id])
     await db.refresh(new_review)
 
     return new_review
 
 @router.delete("/{review_id}")
-async def delete_review(review_id: int, db: AsyncSession = Depends(get_async_db), admin: UserModel = Depends(check_admin)):
+async def delete_review(review_id: int, db: AsyncSession = Depends(get_async_db), admin: CurrentUser = Depends(check_admin)):
     """
     Удаляет отзыв по его ID.
     """
-    db_review = await db.scalar(select(ReviewModel).where(ReviewModel.id == review_id,
-                                                     ReviewModel.is_active == True))
-
-    if not db_review:
+    # Условное обновление: при параллельном удалении агрегаты рейтинга уменьшит только один запрос.
+    # Товар и оценку возвращает RETURNING, отдельное чтение отзыва не нужно
+    deleted = (await db.execute(
+        update(ReviewModel)
+        .where(ReviewModel.id == review_id, ReviewModel.is_active == True)
+        .values(is_active=False)
+        .returning(ReviewModel.product_id, ReviewModel.grade)
+    )).first()
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
-    db_review.is_active = False
-    await update_avg_rating(db_review.product_id, db)
+    await update_avg_rating(deleted.product_id, deleted.grade, -1, db)
     await db.commit()
-    await db.refresh(db_review)
+    await response_cache.invalidate_products([deleted.product_id])
 
-    return {"message": "Review deleted"}
\ No newline at end of file
+    return {"message": "Review deleted"}
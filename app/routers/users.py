@@ -7,7 +7,8 @@ import jwt
 from app.models.users import User as UserModel
 from app.schemas import UserCreate, User as UserSchema
 from app.db_depends import get_async_db
-from app.auth import hash_password, verify_password, create_access_token, create_refresh_token
+from app.auth import hash_password_async, verify_password_async, create_access_token, create_refresh_token
+from app.auth import active_user_stmt
 from app.config import SECRET_KEY, ALGORITHM
 
 
@@ -28,7 +29,7 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)
     # Создание объекта пользователя с хешированным паролем
     db_user = UserModel(
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await hash_password_async(user.password),
         role=user.role
     )
 
@@ -43,10 +44,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     """
     Аутентифицирует пользователя и возвращает access_token и refresh_token.
     """
-    result = await db.scalars(
-        select(UserModel).where(UserModel.email == form_data.username, UserModel.is_active == True))
+    result = await db.scalars(active_user_stmt(form_data.username))
     user = result.first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -73,7 +73,7 @@ async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_async
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    result = await db.scalars(select(UserModel).where(UserModel.email == email, UserModel.is_active == True))
+    result = await db.scalars(active_user_stmt(email))
     user = result.first()
     if user is None:
         raise credentials_exception
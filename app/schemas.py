@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, create_model
+from typing import Any
 from decimal import Decimal
 from datetime import datetime
 
+from app.config import PRODUCT_BATCH_MAX_IDS, STOCK_MAX_QUANTITY
+
 
 """
 Основная концепция разделения классов для создания pydantic-моделей:
@@ -31,6 +34,41 @@ class Category(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryTree(Category):
+    """
+    Модель узла дерева категорий с вложенными подкатегориями.
+    Используется в GET /categories/tree.
+    """
+    children: list["CategoryTree"] = Field(default_factory=list, description="Активные подкатегории")
+
+
+def sparse(model: type[BaseModel]) -> type[BaseModel]:
+    """
+    Схема ответа с параметром ?fields=: те же поля, но необязательные — в ответе только запрошенные.
+    """
+    return create_model(
+        f"{model.__name__}Fields",
+        __doc__=f"{model.__name__} в ответе с параметром fields: присутствуют только запрошенные поля.",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (field.annotation | None, Field(None, description=field.description))
+           for name, field in model.model_fields.items()},
+    )
+
+
+class CursorPage(BaseModel):
+    """
+    Базовая модель страницы при курсорной пагинации.
+    """
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы, null если страница последняя")
+
+
+class CategoryPage(CursorPage):
+    """
+    Страница списка категорий.
+    """
+    items: list[Category] = Field(description="Категории на странице")
+
+
 class ProductCreate(BaseModel):
     """
     Модель для создания и обновления товара.
@@ -58,10 +96,110 @@ class Product(BaseModel):
     image_url: str | None = Field(None, description="URL изображения товара")
     stock: int = Field(description="Количество товара на складе")
     category_id: int = Field(description="ID категории")
+    rating: float = Field(0.0, description="Средняя оценка по активным отзывам")
     is_active: bool = Field(description="Активность товара")
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class ProductPage(CursorPage):
+    """
+    Страница списка товаров.
+    """
+    items: list[Product] = Field(description="Товары на странице")
+
+
+ProductFields = sparse(Product)
+
+
+class ProductFieldsPage(CursorPage):
+    """
+    Страница списка товаров с параметром fields.
+    """
+    items: list[ProductFields] = Field(description="Товары на странице, только запрошенные поля")
+
+
+class ProductBatchRequest(BaseModel):
+    """
+    Запрос нескольких товаров по списку ID (POST-вариант для длинных списков).
+    """
+    ids: list[int] = Field(min_length=1, max_length=PRODUCT_BATCH_MAX_IDS, description="ID товаров")
+
+
+class ProductBatch(BaseModel):
+    """
+    Товары по списку ID в порядке запроса и ID, которые не найдены или неактивны.
+    """
+    items: list[Product] = Field(description="Найденные товары в порядке запроса")
+    missing: list[int] = Field(description="ID отсутствующих или неактивных товаров")
+
+
+class ProductFieldsBatch(BaseModel):
+    """
+    Товары по списку ID с параметром fields.
+    """
+    items: list[ProductFields] = Field(description="Найденные товары в порядке запроса, только запрошенные поля")
+    missing: list[int] = Field(description="ID отсутствующих или неактивных товаров")
+
+
+class StockItem(BaseModel):
+    """
+    Позиция резерва: товар и количество.
+    """
+    product_id: int = Field(description="ID товара")
+    quantity: int = Field(gt=0, le=STOCK_MAX_QUANTITY, description=f"Количество (от 1 до {STOCK_MAX_QUANTITY})")
+
+
+class StockRequest(BaseModel):
+    """
+    Список позиций для резервирования остатков.
+    Применяется целиком или не применяется совсем.
+    """
+    items: list[StockItem] = Field(min_length=1, max_length=PRODUCT_BATCH_MAX_IDS, description="Позиции")
+
+
+class StockReleaseRequest(BaseModel):
+    """
+    Резервы, которые нужно вернуть на склад. Применяется целиком или не применяется совсем.
+    """
+    reservation_ids: list[int] = Field(min_length=1, max_length=PRODUCT_BATCH_MAX_IDS, description="ID резервов")
+
+
+class StockLevel(BaseModel):
+    """
+    Остаток товара после изменения.
+    """
+    product_id: int = Field(description="ID товара")
+    stock: int = Field(description="Остаток на складе")
+
+
+class StockReservation(BaseModel):
+    """
+    Созданный резерв: его ID нужен, чтобы вернуть остаток на склад.
+    """
+    reservation_id: int = Field(description="ID резерва")
+    product_id: int = Field(description="ID товара")
+    quantity: int = Field(description="Зарезервированное количество")
+    stock: int = Field(description="Остаток на складе после резерва")
+
+
+class BulkImportError(BaseModel):
+    """
+    Ошибка импорта одной строки.
+    """
+    row: int = Field(description="Номер строки данных, начиная с 1 (без заголовка CSV)")
+    error: str | list[dict[str, Any]] = Field(description="Описание ошибки или ошибки валидации полей")
+
+
+class BulkImportReport(BaseModel):
+    """
+    Модель отчёта о массовом импорте товаров.
+    """
+    inserted: int = Field(description="Количество добавленных товаров")
+    failed: int = Field(description="Количество отклонённых строк")
+    errors: list[BulkImportError] = Field(description="Ошибки по строкам")
+    errors_truncated: bool = Field(description="В отчёт попали не все ошибки")
+
 class UserCreate(BaseModel):
     email: EmailStr = Field(description="Email пользователя")
     password: str = Field(min_length=8, description="Пароль (минимум 8 символов)")
@@ -97,4 +235,21 @@ class Review(BaseModel):
     grade: int = Field("Оценка продукта от 1 до 5")
     is_active: bool = Field(description="Активность отзыва")
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReviewPage(CursorPage):
+    """
+    Страница списка отзывов.
+    """
+    items: list[Review] = Field(description="Отзывы на странице")
+
+
+ReviewFields = sparse(Review)
+
+
+class ReviewFieldsPage(CursorPage):
+    """
+    Страница списка отзывов с параметром fields.
+    """
+    items: list[ReviewFields] = Field(description="Отзывы на странице, только запрошенные поля")
\ No newline at end of file
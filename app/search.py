@@ -0,0 +1,74 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, literal_column, or_, and_, table, column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product as ProductModel
+from app.pagination import encode_cursor, decode_cursor
+from app.fast_json import row_dicts, with_keys
+
+# Конфигурация текстового поиска PostgreSQL, с которой построена колонка search_vector
+TS_CONFIG = "simple"
+
+# FTS5-таблица SQLite (см. app/models/products.py), rowid совпадает с products.id
+products_fts = table("products_fts", column("rowid"))
+
+
+def _fts5_query(q: str) -> str:
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово берётся в кавычки,
+    чтобы операторы и спецсимволы FTS5 из ввода не ломали синтаксис.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+
+
+def _search_stmt(dialect: str, q: str):
+    """
+    Строит запрос активных товаров, подходящих под q, и выражение релевантности (больше — лучше).
+    """
+    if dialect == "postgresql":
+        search_vector = literal_column("products.search_vector")
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), q)
+        rank = func.ts_rank_cd(search_vector, ts_query)
+        stmt = select(ProductModel).where(ProductModel.is_active == True,
+                                          search_vector.op("@@")(ts_query))
+    else:
+        fts = literal_column("products_fts")
+        # bm25 в FTS5 тем меньше, чем документ релевантнее
+        rank = -func.bm25(fts)
+        stmt = (select(ProductModel)
+                .join(products_fts, products_fts.c.rowid == ProductModel.id)
+                .where(ProductModel.is_active == True, fts.op("MATCH")(_fts5_query(q))))
+    return stmt, rank
+
+
+async def search_products(db: AsyncSession, q: str, cursor: str | None, limit: int,
+                          fields: list[str] | None = None) -> dict:
+    """
+    Полнотекстовый поиск по названию и описанию товара, отсортированный по релевантности.
+    Пагинация keyset по паре (релевантность, id).
+    С fields выбирает только эти колонки и возвращает словари вместо ORM-объектов.
+    """
+    if not q.split():
+        return {"items": [], "next_cursor": None}
+
+    stmt, rank = _search_stmt(db.bind.dialect.name, q)
+    if cursor is not None:
+        last_rank, last_id = decode_cursor(cursor, 2)
+        if not isinstance(last_rank, (int, float)) or not isinstance(last_id, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(or_(rank < last_rank, and_(rank == last_rank, ProductModel.id > last_id)))
+
+    if fields:
+        stmt = stmt.with_only_columns(*with_keys([getattr(ProductModel, field) for field in fields], ProductModel.id))
+    result = await db.execute(stmt.add_columns(rank.label("rank"))
+                              .order_by(rank.desc(), ProductModel.id)
+                              .limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].id if fields else rows[-1][0].id)
+    if fields:
+        # Порядок ключей как у ProductPage: словарь сериализуется напрямую
+        return {"next_cursor": next_cursor, "items": row_dicts(rows, fields)}
+    return {"items": [row[0] for row in rows], "next_cursor": next_cursor}
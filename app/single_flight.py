@@ -0,0 +1,51 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.config import SINGLE_FLIGHT_TIMEOUT
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые чтения: пока запрос по ключу выполняется, остальные вызовы
+    с тем же ключом ждут его результат, а не идут в базу сами.
+    Запрос выполняется в отдельной задаче, поэтому отмена любого из ожидающих (клиент закрыл соединение)
+    не прерывает его для остальных. Функция должна открывать собственную сессию, а не брать сессию запроса.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Ошибку могли не забрать, если все ожидающие отменились; забираем, чтобы asyncio не ругался в лог
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]], timeout: float | None = None) -> T:
+        """
+        Возвращает результат func() для ключа, выполняя не больше одного вызова одновременно.
+        Если вызов не уложился в timeout, он отменяется и все ожидающие получают 504;
+        следующий запрос с тем же ключом начнёт новый вызов.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.wait_for(func(), timeout or self.timeout))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        try:
+            return await asyncio.shield(task)
+        except TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                detail="Database query timed out") from None
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+single_flight = SingleFlight(SINGLE_FLIGHT_TIMEOUT)
@@ -0,0 +1,111 @@
+from fastapi import HTTPException, status
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product as ProductModel, StockReservation as StockReservationModel
+from app.response_cache import response_cache
+from app.schemas import StockItem
+
+RESERVED = "reserved"
+RELEASED = "released"
+
+
+def _merge_items(items: list[StockItem]) -> dict[int, int]:
+    """
+    Складывает количества повторяющихся товаров и упорядочивает позиции по ID товара.
+    """
+    quantities: dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return dict(sorted(quantities.items()))
+
+
+async def _lock_rows(db: AsyncSession, product_ids: list[int]):
+    """
+    Блокирует строки товаров в порядке ID. UPDATE блокирует строки в порядке обхода плана,
+    и два резерва с общими товарами могли бы взаимно заблокироваться; единый порядок это исключает.
+    Для одной строки блокировка не нужна: UPDATE одной строки не может участвовать во взаимной блокировке.
+    """
+    if len(product_ids) > 1:
+        await db.execute(select(ProductModel.id)
+                         .where(ProductModel.id.in_(product_ids))
+                         .order_by(ProductModel.id)
+                         .with_for_update())
+
+
+async def _apply_stock_delta(db: AsyncSession, quantities: dict[int, int], sign: int, *conditions) -> list:
+    """
+    Меняет остатки всех позиций одним UPDATE: stock = stock ± CASE id WHEN ... END.
+    Возвращает строки (id, stock), которые удовлетворили условиям.
+    """
+    quantity = case(quantities, value=ProductModel.id)
+    result = await db.execute(
+        update(ProductModel)
+        .where(ProductModel.id.in_(quantities), *conditions)
+        .values(stock=ProductModel.stock + sign * quantity)
+        .returning(ProductModel.id, ProductModel.stock)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
+
+
+async def reserve_stock(db: AsyncSession, items: list[StockItem], user_id: int) -> list[dict]:
+    """
+    Атомарно резервирует остатки: stock = stock - qty WHERE stock >= qty для всех позиций сразу,
+    и записывает по резерву на каждый товар. Если хоть одна позиция не прошла (нет товара, он неактивен
+    или остатка мало), откатывает всё и отвечает 409.
+    """
+    quantities = _merge_items(items)
+    await _lock_rows(db, list(quantities))
+    rows = await _apply_stock_delta(db, quantities, -1, ProductModel.is_active == True,
+                                    ProductModel.stock >= case(quantities, value=ProductModel.id))
+    if len(rows) != len(quantities):
+        await db.rollback()
+        reserved = {row.id for row in rows}
+        failed = ", ".join(str(product_id) for product_id in quantities if product_id not in reserved)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Insufficient stock or inactive products: {failed}")
+    # Все резервы одним INSERT ... RETURNING
+    reservations = await db.execute(
+        insert(StockReservationModel)
+        .returning(StockReservationModel.id, StockReservationModel.product_id),
+        [{"user_id": user_id, "product_id": product_id, "quantity": quantity, "status": RESERVED}
+         for product_id, quantity in quantities.items()]
+    )
+    reservation_ids = {row.product_id: row.id for row in reservations}
+    await db.commit()
+    await response_cache.invalidate_products(quantities)
+    return [{"reservation_id": reservation_ids[row.id], "product_id": row.id, "quantity": quantities[row.id],
+             "stock": row.stock} for row in sorted(rows)]
+
+
+async def release_stock(db: AsyncSession, reservation_ids: list[int], user_id: int) -> list[dict]:
+    """
+    Возвращает на склад резервы пользователя: условный UPDATE переводит их из reserved в released,
+    и остаток увеличивается ровно на зарезервированное количество. Неактивным товарам остаток тоже возвращается.
+    Если какого-то резерва нет, он чужой или уже возвращён, откатывает всё и отвечает 404.
+    """
+    reservation_ids = sorted(set(reservation_ids))
+    released = (await db.execute(
+        update(StockReservationModel)
+        .where(StockReservationModel.id.in_(reservation_ids), StockReservationModel.user_id == user_id,
+               StockReservationModel.status == RESERVED)
+        .values(status=RELEASED)
+        .returning(StockReservationModel.id, StockReservationModel.product_id, StockReservationModel.quantity)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if len(released) != len(reservation_ids):
+        await db.rollback()
+        found = {row.id for row in released}
+        missing = ", ".join(str(reservation_id) for reservation_id in reservation_ids if reservation_id not in found)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Reservations not found or already released: {missing}")
+    quantities: dict[int, int] = {}
+    for row in released:
+        quantities[row.product_id] = quantities.get(row.product_id, 0) + row.quantity
+    quantities = dict(sorted(quantities.items()))
+    await _lock_rows(db, list(quantities))
+    rows = await _apply_stock_delta(db, quantities, 1)
+    await db.commit()
+    await response_cache.invalidate_products(quantities)
+    return [{"product_id": row.id, "stock": row.stock} for row in sorted(rows)]
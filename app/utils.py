@@ -1,21 +1,20 @@
-from fastapi import Depends
-from app.db_depends import get_async_db
-
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models import Review, Product
-from sqlalchemy import select, func, update
+from app.models import Product
+from sqlalchemy import update, case, cast, Float
 
-async def update_avg_rating(product_id: int, db: AsyncSession):
+async def update_avg_rating(product_id: int, grade: int, delta: int, db: AsyncSession):
     """
-    Функция для обновления рейтинга при добавлении/удалении отзыва.
+    Функция для обновления рейтинга при добавлении (delta=1) или удалении (delta=-1) отзыва.
+    Сумма и количество оценок меняются инкрементально одним UPDATE, без чтения всех отзывов товара.
     """
-    stmt = await db.scalars(select(Review).where(Review.product_id == product_id,
-                                                 Review.is_active == True))
-    db_reviews = stmt.all()
-    reviews_grade = [review.grade for review in db_reviews]
-    avg = sum(reviews_grade) / len(reviews_grade)
+    new_sum = Product.rating_sum + delta * grade
+    new_count = Product.rating_count + delta
     await db.execute(
         update(Product)
         .where(Product.id == product_id)
-        .values(rating = avg)
-    )
\ No newline at end of file
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=case((new_count > 0, cast(new_sum, Float) / new_count), else_=0.0),
+        )
+    )
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth import active_user_stmt
+from app.config import FAST_JSON_RESPONSES, SINGLE_FLIGHT_ENABLED
+from app.fast_json import schema_stmt
+from app.models import Product as ProductModel, Review as ReviewModel
+from app.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_stmt
+from app.response_cache import response_cache
+from app.routers.products import (active_category_stmt, active_product_stmt, active_products_stmt,
+                                  category_products_stmt, product_reviews_stmt, product_version_stmt)
+from app.schemas import Product as ProductSchema, Review as ReviewSchema
+
+logger = logging.getLogger(__name__)
+
+
+def _page_stmts(stmt, model, schema, fast: bool) -> list:
+    """
+    Первая и следующая страницы так, как их читают paginate или fast_page.
+    """
+    if fast:
+        stmt = schema_stmt(stmt, model, schema, None, model.id)
+    return [keyset_stmt(stmt, model.id, cursor, DEFAULT_PAGE_SIZE) for cursor in (None, encode_cursor(0))]
+
+
+def hot_statements() -> list:
+    """
+    Запросы самых частых маршрутов, построенные теми же функциями, что и в роутерах, и в той форме,
+    которую выбирают текущие настройки (FAST_JSON_RESPONSES, SINGLE_FLIGHT_ENABLED, кэш ответов).
+    Их выполнение заполняет кэш скомпилированных запросов SQLAlchemy
+    и кэш подготовленных выражений asyncpg на каждом соединении пула.
+    """
+    reviews_stmt = product_reviews_stmt(0)
+    if response_cache.enabled or FAST_JSON_RESPONSES:
+        reviews_stmt = schema_stmt(reviews_stmt, ReviewModel, ReviewSchema)
+    return [
+        # get_all_products без фильтров
+        *_page_stmts(active_products_stmt(), ProductModel, ProductSchema, FAST_JSON_RESPONSES),
+        # get_products_by_category: проверка категории и страницы без подкатегорий и с ними
+        active_category_stmt(0),
+        *_page_stmts(category_products_stmt(0), ProductModel, ProductSchema,
+                     SINGLE_FLIGHT_ENABLED or FAST_JSON_RESPONSES),
+        *_page_stmts(category_products_stmt(0, "0/"), ProductModel, ProductSchema,
+                     SINGLE_FLIGHT_ENABLED or FAST_JSON_RESPONSES),
+        # get_product, get_reviews_for_products
+        active_product_stmt(0),
+        product_version_stmt(0),
+        reviews_stmt,
+        # get_current_user, login
+        active_user_stmt(""),
+    ]
+
+
+async def _run_statements(connection, statements: list):
+    for stmt in statements:
+        await connection.execute(stmt)
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int, statements: list):
+    """
+    Заранее открывает connections соединений пула и выполняет на каждом горячие запросы.
+    Все соединения удерживаются одновременно, иначе пул раз за разом выдавал бы одно и то же.
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(await engine.connect())
+        await asyncio.gather(*(_run_statements(connection, statements) for connection in opened))
+    finally:
+        for connection in opened:
+            await connection.close()
+    logger.info("Warmed up %s connections to %s", len(opened), engine.url.render_as_string())
@@ -0,0 +1,63 @@
+"""
+Сравнение результатов прогона с базовым:
+
+    python -m benchmarks.compare results.json baseline.json --threshold 0.2
+
+Завершается с кодом 1, если хотя бы один сценарий стал медленнее порога.
+"""
+import argparse
+import json
+import sys
+
+SECTIONS = ["routes", "micro"]
+# Метрика и направление: True, если рост значения — это ухудшение
+METRICS = {"p95_ms": True, "p99_ms": True, "throughput_rps": False}
+# Длительности меньше этой слишком шумные, чтобы сравнивать их в процентах
+MIN_COMPARABLE_MS = 1.0
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Возвращает описания регрессий: метрика ухудшилась больше чем на threshold (доля), появились ошибки
+    или выросло число запросов к базе на HTTP-запрос.
+    Сценарии, которых нет в одном из прогонов, не сравниваются.
+    """
+    regressions = []
+    for section in SECTIONS:
+        for name, result in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if base is None:
+                continue
+            if result.get("errors", 0) > base.get("errors", 0):
+                regressions.append(f"{name}: errors {base.get('errors', 0)} -> {result['errors']}")
+            # Число запросов к базе не шумит, поэтому любой рост — регрессия
+            if "db_queries" in base and result.get("db_queries", 0) > base["db_queries"]:
+                regressions.append(f"{name}: db_queries {base['db_queries']} -> {result['db_queries']}")
+            for metric, higher_is_worse in METRICS.items():
+                old, new = base.get(metric), result.get(metric)
+                if not old or new is None:
+                    continue
+                if metric.endswith("_ms") and max(old, new) < MIN_COMPARABLE_MS:
+                    continue
+                change = (new - old) / old if higher_is_worse else (old - new) / old
+                if change > threshold:
+                    regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Сравнение результатов бенчмарков с базовым прогоном")
+    parser.add_argument("results")
+    parser.add_argument("baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое ухудшение, доля (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    with open(args.results) as current, open(args.baseline) as baseline:
+        regressions = compare(json.load(current), json.load(baseline), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions, threshold {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.seed import Dataset
+
+
+@dataclass
+class Scenario:
+    """
+    Один измеряемый запрос. build(dataset, i) возвращает аргументы httpx.AsyncClient.request
+    для i-го повторения; ответ с другим статусом считается ошибкой.
+    requests и concurrency переопределяют общие настройки прогона, например для маршрутов с bcrypt.
+    max_db_queries — бюджет запросов к базе на один HTTP-запрос, превышение проваливает прогон.
+    """
+    name: str
+    method: str
+    build: Callable[[Dataset, int], dict]
+    expected_status: int = 200
+    requests: int | None = None
+    concurrency: int | None = None
+    max_db_queries: int | None = None
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга по отсортированному списку.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: list[float], wall_time: float, errors: int = 0, response_bytes: int = 0) -> dict:
+    """
+    Сводка по длительностям в секундах: пропускная способность и перцентили в миллисекундах.
+    """
+    values = sorted(durations)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / wall_time, 2) if wall_time else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+        "mean_response_bytes": round(response_bytes / count) if count else 0,
+    }
+
+
+async def run_concurrently(job: Callable[[int], Awaitable], requests: int, concurrency: int) -> tuple[float, list]:
+    """
+    Выполняет job(i) для i в range(requests) не более чем в concurrency задачах одновременно.
+    Возвращает общее время и результаты в порядке i.
+    """
+    results = [None] * requests
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            results[i] = await job(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return time.perf_counter() - started, results
+
+
+def db_queries(response: httpx.Response) -> int | None:
+    """
+    Число запросов к базе из заголовка Server-Timing (db;dur=...;desc="N queries").
+    """
+    match = re.search(r'db;[^,]*desc="(\d+) queries"', response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, dataset: Dataset,
+                       requests: int, concurrency: int) -> dict:
+    """
+    Прогоняет сценарий и возвращает сводку. Первые примеры ответов с ошибкой попадают в отчёт,
+    db_queries — наибольшее число запросов к базе за один HTTP-запрос.
+    Перед замером выполняется один прогревочный запрос с номером requests: он заполняет кэши пользователей
+    и категорий и в сводку не входит, поэтому запасных строк в наборе данных нужно на одну больше requests.
+    """
+    requests = scenario.requests or requests
+    concurrency = scenario.concurrency or concurrency
+    await client.request(scenario.method, **scenario.build(dataset, requests))
+
+    async def job(i: int):
+        kwargs = scenario.build(dataset, i)
+        started = time.perf_counter()
+        response = await client.request(scenario.method, **kwargs)
+        return (time.perf_counter() - started, response.status_code, len(response.content), response.text,
+                db_queries(response))
+
+    wall_time, results = await run_concurrently(job, requests, concurrency)
+    failed = [(status, text) for _, status, _, text, _ in results if status != scenario.expected_status]
+    summary = summarize([duration for duration, *_ in results], wall_time, len(failed),
+                        sum(size for _, _, size, _, _ in results))
+    summary["concurrency"] = concurrency
+    queries = [count for *_, count in results if count is not None]
+    if queries:
+        summary["db_queries"] = max(queries)
+        if scenario.max_db_queries is not None and summary["db_queries"] > scenario.max_db_queries:
+            summary["db_queries_budget_exceeded"] = scenario.max_db_queries
+    if failed:
+        summary["error_samples"] = [f"{status}: {text[:200]}" for status, text in failed[:3]]
+    return summary
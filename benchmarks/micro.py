@@ -0,0 +1,303 @@
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import httpx
+
+from app import database
+from app.category_cache import category_cache
+from app.config import ADMISSION_CONTROL, ADMISSION_QUEUE_SIZE, ADMISSION_READ_LIMIT
+from app.fast_json import json_response, schema_columns
+from app.main import app
+from app.models import Product as ProductModel
+from app.response_cache import response_cache, product_key
+from app.schemas import Product as ProductSchema, ProductPage
+from benchmarks.measure import db_queries, run_concurrently, summarize
+from benchmarks.scenarios import LOGIN_BURST
+from benchmarks.seed import DESCRIPTION_FILLER, DESCRIPTION_LENGTH, INSERT_BATCH, PASSWORD, WORDS, Dataset
+
+FAST_JSON_SIZES = [1000, 10000]
+EXPORT_SIZES = [10000, 100000]
+# Во сколько раз p99 чтения карточки на фоне входов может превышать p99 без них. Запас покрывает работу
+# самих входов в цикле событий (разбор формы, поиск пользователя, JWT); bcrypt в цикле дал бы десятки раз
+LOGIN_INTERFERENCE_MAX_RATIO = 4
+# Во сколько раз пик памяти выгрузки на большем каталоге может превышать пик на меньшем
+EXPORT_MEMORY_GROWTH = 1.5
+
+
+async def _timed(func, repeat: int) -> dict:
+    durations = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        await func()
+        durations.append(time.perf_counter() - call_started)
+    return summarize(durations, time.perf_counter() - started)
+
+
+async def bench_first_requests(client: httpx.AsyncClient, dataset: Dataset) -> dict:
+    """
+    Первый запрос горячих маршрутов сразу после lifespan: показывает, что прогрев пула, кэшей запросов
+    и bcrypt сделан при старте, а не за счёт первых пользователей.
+    """
+    product_id = dataset.product_ids[0]
+    urls = {
+        "first request: GET /products/": "/products/",
+        "first request: GET /products/{product_id}": f"/products/{product_id}",
+        "first request: GET /products/{product_id}/reviews": f"/products/{product_id}/reviews",
+        "first request: GET /products/category/{category_id}": f"/products/category/{dataset.leaf_category_ids[0]}",
+    }
+    results = {}
+    for name, url in urls.items():
+        started = time.perf_counter()
+        response = await client.get(url)
+        duration = time.perf_counter() - started
+        results[name] = summarize([duration], duration, errors=int(response.status_code != 200))
+    return results
+
+
+async def bench_category_tree(db: AsyncSession, repeat: int) -> dict:
+    """
+    Дерево категорий из кэша процесса против загрузки из базы с построением дерева на каждый вызов.
+    """
+    await category_cache.load(db)
+    return {
+        "category_tree: cache": await _timed(lambda: category_cache.get_tree(db), repeat),
+        "category_tree: database": await _timed(lambda: category_cache.load(db), repeat),
+    }
+
+
+def _repeat_to(items: list, size: int) -> list:
+    return (items * (size // len(items) + 1))[:size]
+
+
+async def bench_fast_json(db: AsyncSession, repeat: int) -> dict:
+    """
+    Сериализация страницы товаров на 1k и 10k строк: путь FastAPI через response_model
+    (валидация ORM-объектов, dump в режиме json, json.dumps) против fast_json по кортежам колонок.
+    """
+    objects = (await db.scalars(select(ProductModel).limit(max(FAST_JSON_SIZES)))).all()
+    rows = (await db.execute(select(*schema_columns(ProductModel, ProductSchema))
+                             .limit(max(FAST_JSON_SIZES)))).all()
+    adapter = TypeAdapter(ProductPage)
+    results = {}
+    for size in FAST_JSON_SIZES:
+        page_objects = _repeat_to(objects, size)
+        page_rows = _repeat_to(rows, size)
+
+        async def response_model():
+            value = adapter.validate_python({"items": page_objects, "next_cursor": None}, from_attributes=True)
+            JSONResponse(adapter.dump_python(value, mode="json"))
+
+        async def fast():
+            json_response({"next_cursor": None, "items": [row._asdict() for row in page_rows]})
+
+        results[f"serialize {size} products: response_model"] = await _timed(response_model, repeat)
+        results[f"serialize {size} products: fast_json"] = await _timed(fast, repeat)
+    return results
+
+
+async def bench_single_flight(client: httpx.AsyncClient, dataset: Dataset, callers: int) -> dict:
+    """
+    callers одновременных одинаковых запросов карточки товара и страницы категории: при объединении чтений
+    они вместе выполняют в базе столько же запросов, сколько один такой запрос. Запросы общего вызова
+    попадают в Server-Timing первого запроса, поэтому сумма по всем ответам — число запросов к базе.
+    """
+    if ADMISSION_CONTROL:
+        # Запросы сверх лимита группы ждут в очереди и приходят к базе после общего вызова
+        callers = min(callers, ADMISSION_READ_LIMIT)
+    product_id = dataset.product_ids[0]
+    urls = {
+        "single_flight: GET /products/{product_id}": f"/products/{product_id}",
+        "single_flight: GET /products/category/{category_id}":
+            f"/products/category/{dataset.leaf_category_ids[0]}?limit=17",
+    }
+    results = {}
+    for name, url in urls.items():
+        await response_cache.invalidate(product_key(product_id))
+        solo = db_queries(await client.get(url))
+        await response_cache.invalidate(product_key(product_id))
+
+        async def timed_get():
+            started = time.perf_counter()
+            response = await client.get(url)
+            return time.perf_counter() - started, response
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(timed_get() for _ in range(callers)))
+        result = summarize([duration for duration, _ in responses], time.perf_counter() - started,
+                           errors=sum(response.status_code != 200 for _, response in responses))
+        result["db_queries"] = sum(db_queries(response) or 0 for _, response in responses)
+        if result["db_queries"] > solo:
+            result["db_queries_budget_exceeded"] = solo
+        results[name] = result
+    return results
+
+
+async def bench_admission(client: httpx.AsyncClient, overload: int = 3) -> dict:
+    """
+    Поиск при нагрузке в overload раз больше, чем группа чтения может принять и поставить в очередь:
+    латентность пропущенных запросов и число отказов 503. Только при ADMISSION_CONTROL=1.
+    """
+    if not ADMISSION_CONTROL:
+        return {}
+    callers = overload * (ADMISSION_READ_LIMIT + ADMISSION_QUEUE_SIZE)
+
+    async def timed_search(i: int):
+        started = time.perf_counter()
+        response = await client.get("/products/search", params={"q": WORDS[i % len(WORDS)]})
+        return time.perf_counter() - started, response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(timed_search(i) for i in range(callers)))
+    wall_time = time.perf_counter() - started
+    admitted = [duration for duration, response in responses if response.status_code == 200]
+    shed = [response for _, response in responses if response.status_code == 503]
+    result = summarize(admitted, wall_time, errors=callers - len(admitted) - len(shed))
+    result["shed"] = len(shed)
+    result["retry_after_missing"] = sum("retry-after" not in response.headers for response in shed)
+    return {f"admission: GET /products/search at {overload}x capacity": result}
+
+
+async def bench_login_interference(client: httpx.AsyncClient, dataset: Dataset, requests: int,
+                                   concurrency: int) -> dict:
+    """
+    Карточка товара при постоянной конкурентности отдельно и на фоне LOGIN_BURST одновременных входов:
+    хэширование bcrypt не должно занимать event loop и поднимать p99 чтений. Если p99 на фоне входов
+    больше p99 без них в LOGIN_INTERFERENCE_MAX_RATIO раз, замер отмечается как превысивший бюджет.
+    """
+    product_id = dataset.product_ids[0]
+
+    async def timed_get(i: int):
+        started = time.perf_counter()
+        response = await client.get(f"/products/{product_id}")
+        return time.perf_counter() - started, response.status_code
+
+    async def login():
+        response = await client.post("/users/token",
+                                     data={"username": dataset.users["buyer"]["email"], "password": PASSWORD})
+        return response.status_code
+
+    # Первые запросы заполняют кэш ответов и не должны попасть в p99 без нагрузки
+    await run_concurrently(timed_get, concurrency, concurrency)
+    results = {}
+    for name, burst in (("alone", False), (f"during {LOGIN_BURST} logins", True)):
+        # Входы стартуют вместе с чтениями и выполняются параллельно с ними
+        # Сборка мусора от предыдущих замеров задержала бы разом все одновременные запросы одной фазы
+        gc.collect()
+        logins = asyncio.ensure_future(asyncio.gather(*(login() for _ in range(LOGIN_BURST)))) if burst else None
+        wall_time, responses = await run_concurrently(timed_get, requests, concurrency)
+        result = summarize([duration for duration, _ in responses], wall_time,
+                           errors=sum(code != 200 for _, code in responses))
+        if logins is not None:
+            result["login_errors"] = sum(code != 200 for code in await logins)
+        results[f"login_interference: GET /products/{{product_id}} {name}"] = result
+    alone, loaded = results.values()
+    budget = round(alone["p99_ms"] * LOGIN_INTERFERENCE_MAX_RATIO, 3)
+    if loaded["p99_ms"] > budget:
+        loaded["latency_budget_exceeded"] = budget
+    return results
+
+
+async def _stream_export(url: str) -> int:
+    """
+    Выполняет GET напрямую через ASGI-приложение и отбрасывает тело по частям.
+    httpx.ASGITransport накапливает всё тело ответа, и его размер попал бы в пик памяти.
+    """
+    path, _, query = url.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+             "headers": [(b"host", b"benchmark")], "server": ("benchmark", 80), "client": ("127.0.0.1", 0)}
+    received, disconnected = False, asyncio.Event()
+    size = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return size
+
+
+async def bench_export_memory(dataset: Dataset) -> dict:
+    """
+    Пик памяти (tracemalloc) при потоковой выгрузке GET /products/export на каталогах из EXPORT_SIZES
+    активных товаров. Недостающие товары временно добавляются и удаляются после замера.
+    Если пик растёт вместе с числом строк больше чем в EXPORT_MEMORY_GROWTH раз, выгрузка где-то
+    накапливает весь каталог, и замер отмечается как превысивший бюджет.
+    """
+    async with database.async_session_maker() as db:
+        first_added = await db.scalar(select(func.max(ProductModel.id))) + 1
+    next_id = first_added
+    results, peaks = {}, []
+    try:
+        for size in EXPORT_SIZES:
+            async with database.async_session_maker() as db:
+                active = await db.scalar(select(func.count()).where(ProductModel.is_active == True))
+                missing = size - active
+                rows = [{"id": product_id, "name": f"Export {product_id}",
+                         "description": DESCRIPTION_FILLER[:DESCRIPTION_LENGTH],
+                         "price": Decimal("9.99"), "stock": 1, "is_active": True,
+                         "category_id": dataset.leaf_category_ids[product_id % len(dataset.leaf_category_ids)],
+                         "seller_id": dataset.users["seller"]["id"],
+                         "rating": 0.0, "rating_sum": 0, "rating_count": 0}
+                        for product_id in range(next_id, next_id + max(missing, 0))]
+                for start in range(0, len(rows), INSERT_BATCH):
+                    await db.execute(insert(ProductModel), rows[start:start + INSERT_BATCH])
+                await db.commit()
+                next_id += len(rows)
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            response_bytes = await _stream_export("/products/export?format=ndjson")
+            duration = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            result = summarize([duration], duration, response_bytes=response_bytes)
+            result["rows"] = max(size, active)
+            result["peak_memory_bytes"] = peak
+            results[f"export_memory: GET /products/export {size} rows"] = result
+            peaks.append(peak)
+    finally:
+        async with database.async_session_maker() as db:
+            await db.execute(delete(ProductModel).where(ProductModel.id >= first_added))
+            await db.commit()
+    if peaks[-1] > peaks[0] * EXPORT_MEMORY_GROWTH:
+        results[f"export_memory: GET /products/export {EXPORT_SIZES[-1]} rows"]["memory_budget_exceeded"] = \
+            round(peaks[0] * EXPORT_MEMORY_GROWTH)
+    return results
+
+
+def bench_import_time(repeat: int) -> dict:
+    """
+    Время импорта app.main в отдельном процессе: холодный старт без обращения к базе.
+    """
+    code = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    durations = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, env=os.environ, check=True,
+                                capture_output=True, text=True).stdout
+        durations.append(float(output.split()[-1]))
+    return {"import app.main": summarize(durations, sum(durations))}
@@ -0,0 +1,162 @@
+"""
+Бенчмарк всех эндпоинтов приложения без Postgres:
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.run --products 10000 --reviews 50000 --output results.json
+    python -m benchmarks.run --output results.json --baseline baseline.json --threshold 0.2
+
+Приложение запускается в процессе вместе со своим lifespan, запросы идут через httpx.ASGITransport,
+база по умолчанию — временный файл SQLite (aiosqlite). Через --database можно указать пустую базу Postgres
+после alembic upgrade head. Настройки приложения задаются переменными окружения через --env KEY=VALUE,
+например --env FAST_JSON_RESPONSES=1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк эндпоинтов интернет-магазина")
+    parser.add_argument("--categories", type=int, default=100, help="Число категорий")
+    parser.add_argument("--products", type=int, default=5000, help="Число товаров")
+    parser.add_argument("--reviews", type=int, default=20000, help="Число отзывов")
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+    parser.add_argument("--micro-repeat", type=int, default=20, help="Повторов в микробенчмарках")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Запускать только сценарии, в названии которых есть подстрока (можно повторять)")
+    parser.add_argument("--skip-micro", action="store_true", help="Не запускать микробенчмарки")
+    parser.add_argument("--database", help="URL пустой базы вместо временного файла SQLite")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Переменная окружения для настроек приложения (можно повторять)")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора данных")
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--baseline", help="Результаты базового прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое ухудшение, доля (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace, database_url: str):
+    """
+    app.config читает окружение при импорте, поэтому его нужно настроить до импорта приложения.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    for item in args.env:
+        key, _, value = item.partition("=")
+        os.environ[key] = value
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from app import database
+    from app.main import app
+    from benchmarks.measure import run_scenario, summarize
+    from benchmarks.micro import (bench_admission, bench_category_tree, bench_export_memory, bench_fast_json,
+                                  bench_first_requests, bench_import_time, bench_login_interference,
+                                  bench_single_flight)
+    from benchmarks.scenarios import all_scenarios
+    from benchmarks.seed import seed
+
+    engine = database.init_engines()
+    started = time.perf_counter()
+    dataset = await seed(engine, args.categories, args.products, args.reviews, spare=args.requests + 1,
+                         seed_value=args.seed)
+    print(f"Seeded {args.categories} categories, {args.products} products, {args.reviews} reviews "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    routes, micro = {}, {}
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        micro["lifespan startup"] = summarize([time.perf_counter() - started], time.perf_counter() - started)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            if not args.skip_micro:
+                # До сценариев: первые запросы после старта не должны платить за холодные кэши и пул
+                micro.update(await bench_first_requests(client, dataset))
+            for scenario in all_scenarios():
+                if args.only and not any(part in scenario.name for part in args.only):
+                    continue
+                result = await run_scenario(client, scenario, dataset, args.requests, args.concurrency)
+                routes[scenario.name] = result
+                print(f"{scenario.name:<60} {result['throughput_rps']:>9.1f} rps  p50 {result['p50_ms']:>8.2f}  "
+                      f"p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}")
+            if not args.skip_micro:
+                micro.update(await bench_single_flight(client, dataset, args.concurrency * 25))
+                micro.update(await bench_admission(client))
+                micro.update(await bench_login_interference(client, dataset, args.requests, args.concurrency))
+                micro.update(await bench_export_memory(dataset))
+
+        if not args.skip_micro:
+            async with database.async_read_session_maker() as db:
+                micro.update(await bench_category_tree(db, args.micro_repeat))
+                micro.update(await bench_fast_json(db, args.micro_repeat))
+    if not args.skip_micro:
+        micro.update(bench_import_time(min(args.micro_repeat, 5)))
+    for name, result in micro.items():
+        print(f"{name:<60} p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+              f"p99 {result['p99_ms']:>8.2f} ms")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "categories": args.categories,
+            "products": args.products,
+            "reviews": args.reviews,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "env": args.env,
+        },
+        "routes": routes,
+        "micro": micro,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="ecommerce-bench-") as directory:
+        configure_environment(args, args.database or f"sqlite+aiosqlite:///{directory}/benchmark.db")
+        results = asyncio.run(run(args))
+
+    exit_code = 0
+    for name, result in (results["routes"] | results["micro"]).items():
+        if "db_queries_budget_exceeded" in result:
+            print(f"BUDGET {name}: {result['db_queries']} DB queries, "
+                  f"budget {result['db_queries_budget_exceeded']}")
+            exit_code = 1
+        if "latency_budget_exceeded" in result:
+            print(f"BUDGET {name}: p99 {result['p99_ms']} ms, budget {result['latency_budget_exceeded']} ms")
+            exit_code = 1
+        if "memory_budget_exceeded" in result:
+            print(f"BUDGET {name}: peak {result['peak_memory_bytes']} bytes, "
+                  f"budget {result['memory_budget_exceeded']}")
+            exit_code = 1
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+    if args.baseline:
+        from benchmarks.compare import compare
+
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regressions, threshold {args.threshold:.0%}")
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import json
+
+from app.conditional import make_etag
+from app.pagination import encode_cursor
+from benchmarks.measure import Scenario
+from benchmarks.seed import PASSWORD, SPARE_RESERVATIONS, WORDS, Dataset
+
+# Маршруты с bcrypt на порядки медленнее остальных, для них хватает меньшего числа запросов
+BCRYPT_REQUESTS = 32
+# Одновременные входы: проверяет очередь пула хеширования, интересен p99
+LOGIN_BURST = 32
+BULK_ROWS = 100
+# Сотни покупателей одновременно резервируют один и тот же товар
+HOT_SKU_REQUESTS = 400
+HOT_SKU_CONCURRENCY = 200
+# Поля карточки в списке товаров: без описания и служебных полей
+LISTING_FIELDS = "id,name,price,image_url"
+
+
+def pick(ids: list[int], i: int) -> int:
+    """
+    Детерминированно разбрасывает повторения сценария по строкам, чтобы не читать одну и ту же.
+    """
+    return ids[i * 7919 % len(ids)]
+
+
+def _bulk_body(dataset: Dataset, i: int) -> str:
+    rows = ({"name": f"Bulk {i} {n}", "price": "9.99", "stock": 1, "category_id": pick(dataset.leaf_category_ids, n)}
+            for n in range(BULK_ROWS))
+    return "\n".join(json.dumps(row) for row in rows)
+
+
+def _batch_ids(dataset: Dataset, i: int, size: int = 50) -> list[int]:
+    return [pick(dataset.product_ids, i * size + n) for n in range(size)]
+
+
+def _stock_items(dataset: Dataset, i: int, size: int) -> list[dict]:
+    # Позиции в разном порядке в разных запросах: проверяет, что блокировки берутся в едином порядке
+    ids = [dataset.hot_product_ids[(i + n) % len(dataset.hot_product_ids)] for n in range(size)]
+    return [{"product_id": product_id, "quantity": 1} for product_id in (ids if i % 2 else ids[::-1])]
+
+
+def _product_body(dataset: Dataset, i: int) -> dict:
+    return {"name": f"Benchmark {i}", "description": "benchmark product", "price": "19.99", "stock": 10,
+            "category_id": pick(dataset.leaf_category_ids, i)}
+
+
+def read_scenarios() -> list[Scenario]:
+    return [
+        Scenario("GET /", "GET", lambda d, i: {"url": "/"}),
+        Scenario("GET /categories/", "GET", lambda d, i: {"url": "/categories/"}),
+        Scenario("GET /categories/ (cursor)", "GET", lambda d, i: {
+            "url": "/categories/", "params": {"cursor": encode_cursor(pick(d.category_ids, i))}}),
+        Scenario("GET /categories/tree", "GET", lambda d, i: {"url": "/categories/tree"}),
+        Scenario("GET /products/", "GET", lambda d, i: {"url": "/products/"}),
+        Scenario("GET /products/ (cursor, limit=100)", "GET", lambda d, i: {
+            "url": "/products/", "params": {"cursor": encode_cursor(pick(d.product_ids, i)), "limit": 100}}),
+        Scenario("GET /products/ (cursor, limit=100, fields=listing)", "GET", lambda d, i: {
+            "url": "/products/", "params": {"cursor": encode_cursor(pick(d.product_ids, i)), "limit": 100,
+                                            "fields": LISTING_FIELDS}}),
+        Scenario("GET /products/?sort=price_asc&min_price&max_price", "GET", lambda d, i: {
+            "url": "/products/", "params": {"sort": "price_asc", "min_price": "100", "max_price": "2000"}}),
+        Scenario("GET /products/?sort=price_desc&category_id&in_stock (cursor)", "GET", lambda d, i: {
+            "url": "/products/", "params": {"sort": "price_desc", "category_id": pick(d.leaf_category_ids, i),
+                                            "in_stock": True, "cursor": encode_cursor("5000.00", 1)}}),
+        Scenario("GET /products/?sort=rating_desc&min_rating", "GET", lambda d, i: {
+            "url": "/products/", "params": {"sort": "rating_desc", "min_rating": 4}}),
+        Scenario("GET /products/?sort=newest&seller_id", "GET", lambda d, i: {
+            "url": "/products/", "params": {"sort": "newest", "seller_id": d.users["seller"]["id"]}}),
+        Scenario("GET /products/category/{category_id}", "GET", lambda d, i: {
+            "url": f"/products/category/{pick(d.leaf_category_ids, i)}"}),
+        Scenario("GET /products/category/{category_id} (fields=listing)", "GET", lambda d, i: {
+            "url": f"/products/category/{pick(d.leaf_category_ids, i)}", "params": {"fields": LISTING_FIELDS}}),
+        Scenario("GET /products/category/{category_id}?include_descendants", "GET", lambda d, i: {
+            "url": f"/products/category/{pick(d.root_category_ids, i)}",
+            "params": {"include_descendants": True}}),
+        Scenario("GET /products/search", "GET", lambda d, i: {
+            "url": "/products/search", "params": {"q": WORDS[i % len(WORDS)]}}),
+        Scenario("GET /products/search (fields=listing)", "GET", lambda d, i: {
+            "url": "/products/search", "params": {"q": WORDS[i % len(WORDS)], "fields": LISTING_FIELDS}}),
+        Scenario("GET /products/export", "GET", lambda d, i: {
+            "url": "/products/export", "params": {"format": "ndjson"}}, requests=5, concurrency=1),
+        Scenario("GET /products/batch (50 ids)", "GET", lambda d, i: {
+            "url": "/products/batch", "params": {"ids": _batch_ids(d, i)}}, max_db_queries=1),
+        Scenario("GET /products/batch (50 ids, fields=listing)", "GET", lambda d, i: {
+            "url": "/products/batch", "params": {"ids": _batch_ids(d, i), "fields": LISTING_FIELDS}},
+            max_db_queries=1),
+        Scenario("POST /products/batch (100 ids)", "POST", lambda d, i: {
+            "url": "/products/batch", "json": {"ids": _batch_ids(d, i, 100)}}, max_db_queries=1),
+        Scenario("GET /products/{product_id}", "GET", lambda d, i: {
+            "url": f"/products/{pick(d.product_ids, i)}"}),
+        Scenario("GET /products/{product_id} (If-None-Match)", "GET", lambda d, i: {
+            "url": f"/products/{pick(d.product_ids, i)}",
+            "headers": {"If-None-Match": make_etag("product", pick(d.product_ids, i), 1)}}, expected_status=304),
+        Scenario("GET /products/{product_id}/reviews", "GET", lambda d, i: {
+            "url": f"/products/{pick(d.product_ids, i)}/reviews"}),
+        Scenario("GET /reviews/", "GET", lambda d, i: {"url": "/reviews/"}),
+        Scenario("GET /reviews/ (cursor)", "GET", lambda d, i: {
+            "url": "/reviews/", "params": {"cursor": encode_cursor(pick(d.review_ids, i))}}),
+    ]
+
+
+def write_scenarios() -> list[Scenario]:
+    """
+    Сценарии записи. Изменяют и удаляют только запасные строки, поэтому каждому повторению нужна своя строка:
+    число повторений не должно превышать число запасных строк.
+    Бюджеты max_db_queries фиксируют, что изменения идут одним UPDATE ... RETURNING без предварительных SELECT.
+    """
+    return [
+        Scenario("POST /users/", "POST", lambda d, i: {
+            "url": "/users/", "json": {"email": f"user{i}@bench.example.com", "password": PASSWORD, "role": "buyer"}},
+            expected_status=201, requests=BCRYPT_REQUESTS),
+        Scenario("POST /users/token", "POST", lambda d, i: {
+            "url": "/users/token", "data": {"username": d.users["buyer"]["email"], "password": PASSWORD}},
+            requests=BCRYPT_REQUESTS),
+        Scenario("POST /users/token (burst)", "POST", lambda d, i: {
+            "url": "/users/token", "data": {"username": d.users["buyer"]["email"], "password": PASSWORD}},
+            requests=LOGIN_BURST, concurrency=LOGIN_BURST),
+        Scenario("POST /users/refresh-token", "POST", lambda d, i: {
+            "url": "/users/refresh-token", "params": {"refresh_token": d.users["buyer"]["refresh_token"]}}),
+        Scenario("POST /categories/", "POST", lambda d, i: {
+            "url": "/categories/", "json": {"name": f"New category {i}", "parent_id": pick(d.category_ids, i)}},
+            expected_status=201),
+        Scenario("PUT /categories/{category_id}", "PUT", lambda d, i: {
+            "url": f"/categories/{d.spare_category_ids[i]}",
+            "json": {"name": f"Renamed category {i}", "parent_id": pick(d.category_ids, i)}}, max_db_queries=3),
+        Scenario("POST /products/", "POST", lambda d, i: {
+            "url": "/products/", "json": _product_body(d, i), "headers": d.headers("seller")}, expected_status=201),
+        Scenario("POST /products/bulk", "POST", lambda d, i: {
+            "url": "/products/bulk", "content": _bulk_body(d, i),
+            "headers": {**d.headers("seller"), "Content-Type": "application/x-ndjson"}}, requests=10, concurrency=1),
+        Scenario("PUT /products/{product_id}", "PUT", lambda d, i: {
+            "url": f"/products/{d.spare_product_ids[i]}", "json": _product_body(d, i), "headers": d.headers("seller")},
+            max_db_queries=1),
+        Scenario("POST /products/stock/reserve (hot SKU)", "POST", lambda d, i: {
+            "url": "/products/stock/reserve", "json": {"items": _stock_items(d, 0, 1)}, "headers": d.headers("buyer")},
+            requests=HOT_SKU_REQUESTS, concurrency=HOT_SKU_CONCURRENCY, max_db_queries=2),
+        Scenario("POST /products/stock/reserve (5 items)", "POST", lambda d, i: {
+            "url": "/products/stock/reserve", "json": {"items": _stock_items(d, i, 5)}, "headers": d.headers("buyer")},
+            max_db_queries=3),
+        Scenario("POST /products/stock/release", "POST", lambda d, i: {
+            "url": "/products/stock/release", "headers": d.headers("buyer"),
+            "json": {"reservation_ids": d.spare_reservation_ids[i * SPARE_RESERVATIONS:(i + 1) * SPARE_RESERVATIONS]}},
+            max_db_queries=3),
+        Scenario("POST /reviews/", "POST", lambda d, i: {
+            "url": "/reviews/", "json": {"product_id": d.spare_product_ids[i], "comment": "benchmark", "grade": 4},
+            "headers": d.headers("buyer")}),
+        Scenario("DELETE /reviews/{review_id}", "DELETE", lambda d, i: {
+            "url": f"/reviews/{d.spare_review_ids[i]}", "headers": d.headers("admin")}, max_db_queries=2),
+        Scenario("DELETE /products/{product_id}", "DELETE", lambda d, i: {
+            "url": f"/products/{d.spare_product_ids[i]}", "headers": d.headers("seller")}, max_db_queries=1),
+        Scenario("DELETE /categories/{category_id}", "DELETE", lambda d, i: {
+            "url": f"/categories/{d.spare_category_ids[i]}"}, max_db_queries=1),
+    ]
+
+
+def all_scenarios() -> list[Scenario]:
+    return read_scenarios() + write_scenarios()
@@ -0,0 +1,155 @@
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth import create_access_token, create_refresh_token, hash_password
+from app.database import Base
+from app.models import Category as CategoryModel, Product as ProductModel
+from app.models import Review as ReviewModel, StockReservation as StockReservationModel, User as UserModel
+
+PASSWORD = "benchmark-password"
+# Слова для названий товаров, по ним же ищет сценарий /products/search
+WORDS = ["phone", "laptop", "camera", "watch", "tablet", "speaker", "monitor", "keyboard", "mouse", "router"]
+INSERT_BATCH = 5000
+# Описания товаров в каталоге обычно длинные: три слова для поиска и наполнитель до DESCRIPTION_LENGTH символов
+DESCRIPTION_LENGTH = 500
+DESCRIPTION_FILLER = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor " * 8
+# Товары с практически бесконечным остатком для сценариев резервирования на «горячих» позициях
+HOT_PRODUCTS = 10
+HOT_STOCK = 10 ** 9
+# Резервов на «горячих» товарах на одну запасную строку: их возвращает сценарий release
+SPARE_RESERVATIONS = 5
+
+
+@dataclass
+class Dataset:
+    """
+    Идентификаторы засеянных строк и токены пользователей для сценариев.
+    Запасные строки (spare_*) изменяются и удаляются сценариями записи, остальные только читаются.
+    """
+    category_ids: list[int]
+    root_category_ids: list[int]
+    leaf_category_ids: list[int]
+    product_ids: list[int]
+    review_ids: list[int]
+    spare_category_ids: list[int]
+    spare_product_ids: list[int]
+    spare_review_ids: list[int]
+    hot_product_ids: list[int]
+    spare_reservation_ids: list[int]
+    users: dict[str, dict] = field(default_factory=dict)
+
+    def headers(self, role: str) -> dict:
+        return {"Authorization": f"Bearer {self.users[role]['access_token']}"}
+
+
+async def _insert(conn, model, rows: list[dict]):
+    for start in range(0, len(rows), INSERT_BATCH):
+        await conn.execute(insert(model), rows[start:start + INSERT_BATCH])
+
+
+async def seed(engine: AsyncEngine, categories: int, products: int, reviews: int, spare: int,
+               seed_value: int = 0) -> Dataset:
+    """
+    Создаёт схему и засеивает пустую базу: categories × products × reviews плюс spare запасных строк
+    каждого вида, HOT_PRODUCTS товаров для резервирования и SPARE_RESERVATIONS резервов на запасную строку. Строки вставляются пачками executemany, рейтинги товаров считаются заранее.
+    """
+    rnd = random.Random(seed_value)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if engine.dialect.name == "sqlite":
+            # WAL позволяет читать параллельно с записью, как в Postgres
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        hashed_password = hash_password(PASSWORD)
+        users = [{"id": index, "email": f"{role}@bench.example.com", "hashed_password": hashed_password,
+                  "role": role, "is_active": True}
+                 for index, role in enumerate(["admin", "seller", "buyer"], start=1)]
+        await _insert(conn, UserModel, users)
+        seller_id, buyer_id = users[1]["id"], users[2]["id"]
+
+        # Корни составляют десятую часть категорий, остальные категории — их дочерние
+        category_rows = []
+        roots = max(1, categories // 10)
+        for category_id in range(1, categories + spare + 1):
+            if category_id <= roots:
+                parent = None
+                path = f"{category_id}/"
+            else:
+                parent = category_rows[rnd.randrange(roots)]
+                path = f"{parent['path']}{category_id}/"
+            category_rows.append({"id": category_id, "name": f"Category {category_id}", "is_active": True,
+                                  "parent_id": parent and parent["id"], "path": path})
+        await _insert(conn, CategoryModel, category_rows)
+        category_ids = list(range(1, categories + 1))
+        leaf_category_ids = category_ids[roots:] or category_ids
+
+        product_rows = []
+        for product_id in range(1, products + spare + HOT_PRODUCTS + 1):
+            product_rows.append({
+                "id": product_id,
+                "name": f"{rnd.choice(WORDS).title()} {product_id}",
+                "description": f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {rnd.choice(WORDS)} "
+                               f"{DESCRIPTION_FILLER}"[:DESCRIPTION_LENGTH],
+                "price": Decimal(rnd.randrange(100, 1000000)) / 100,
+                "image_url": None,
+                "stock": HOT_STOCK if product_id > products + spare else rnd.randrange(0, 1000),
+                "is_active": True,
+                "category_id": rnd.choice(leaf_category_ids),
+                "seller_id": seller_id,
+                "rating": 0.0, "rating_sum": 0, "rating_count": 0,
+            })
+
+        review_rows = []
+        for review_id in range(1, reviews + spare + 1):
+            # Запасные отзывы относятся к запасным товарам, чтобы их удаление не меняло читаемые товары
+            if review_id <= reviews:
+                product = product_rows[rnd.randrange(products)]
+            else:
+                product = product_rows[products + rnd.randrange(spare)]
+            grade = rnd.randint(1, 5)
+            product["rating_sum"] += grade
+            product["rating_count"] += 1
+            review_rows.append({"id": review_id, "user_id": buyer_id, "product_id": product["id"],
+                                "comment": f"Review {review_id}", "grade": grade, "is_active": True})
+        for product in product_rows:
+            if product["rating_count"]:
+                product["rating"] = product["rating_sum"] / product["rating_count"]
+        await _insert(conn, ProductModel, product_rows)
+        await _insert(conn, ReviewModel, review_rows)
+        # Резервы одного повторения приходятся на разные товары
+        hot_product_ids = list(range(products + spare + 1, products + spare + HOT_PRODUCTS + 1))
+        reservation_rows = [{"id": reservation_id, "user_id": buyer_id, "quantity": 1, "status": "reserved",
+                             "product_id": hot_product_ids[reservation_id % HOT_PRODUCTS]}
+                            for reservation_id in range(1, spare * SPARE_RESERVATIONS + 1)]
+        await _insert(conn, StockReservationModel, reservation_rows)
+
+        if engine.dialect.name == "postgresql":
+            # Явные id не сдвигают последовательности, иначе POST-сценарии получат конфликт ключей
+            for model in (UserModel, CategoryModel, ProductModel, ReviewModel, StockReservationModel):
+                table = model.__tablename__
+                max_id = await conn.scalar(select(func.max(model.id)))
+                await conn.execute(text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :max_id)"),
+                                   {"table": table, "max_id": max_id})
+
+    dataset = Dataset(
+        category_ids=category_ids,
+        root_category_ids=category_ids[:roots],
+        leaf_category_ids=leaf_category_ids,
+        product_ids=list(range(1, products + 1)),
+        review_ids=list(range(1, reviews + 1)),
+        spare_category_ids=list(range(categories + 1, categories + spare + 1)),
+        spare_product_ids=list(range(products + 1, products + spare + 1)),
+        spare_review_ids=list(range(reviews + 1, reviews + spare + 1)),
+        hot_product_ids=hot_product_ids,
+        spare_reservation_ids=[row["id"] for row in reservation_rows],
+    )
+    for user in users:
+        claims = {"sub": user["email"], "role": user["role"], "id": user["id"]}
+        dataset.users[user["role"]] = {"id": user["id"], "email": user["email"],
+                                       "access_token": create_access_token(claims),
+                                       "refresh_token": create_refresh_token(claims)}
+    return dataset
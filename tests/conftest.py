@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app.config читает окружение при импорте, поэтому база и ключ настраиваются до импорта приложения.
+# Без DATABASE_URL тесты идут на временном файле SQLite; для Postgres нужна пустая база после alembic upgrade head
+_directory = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_directory}/tests.db")
+os.environ.setdefault("SECRET_KEY", "tests-secret-key")
+# Кэш ответов скрывал бы запросы к базе, которые проверяют тесты
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "none")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def dataset(anyio_backend):
+    """
+    Схема и данные создаются один раз на всю сессию: seed вставляет строки с фиксированными ID.
+    """
+    from app import database
+    from benchmarks.seed import seed
+
+    return await seed(database.init_engines(), categories=30, products=300, reviews=600, spare=5)
@@ -0,0 +1,91 @@
+"""
+Регрессионный тест планов запросов: каждый сценарий бенчмарка выполняется через приложение, а каждый
+выполненный им SELECT, UPDATE и DELETE объясняется базой. Полный просмотр products или reviews
+(SCAN в SQLite, Seq Scan в Postgres) означает, что запрос разошёлся с частичными индексами.
+Исключение — обход индекса в запросах с LIMIT: keyset-страница читает индекс по порядку и останавливается.
+Для сценариев с max_db_queries проверяется и число запросов к базе из заголовка Server-Timing.
+"""
+import re
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.main import app
+from benchmarks.measure import db_queries
+from benchmarks.scenarios import read_scenarios, write_scenarios
+
+SCENARIOS = read_scenarios() + write_scenarios()
+BUDGETED = [scenario for scenario in SCENARIOS if scenario.max_db_queries is not None]
+# Выгрузка каталога читает все активные товары по определению
+FULL_SCAN_ALLOWED = {"GET /products/export"}
+EXPLAINED = ("SELECT", "WITH", "UPDATE", "DELETE")
+SQLITE_SCAN = re.compile(r"^SCAN (products|reviews)\b")
+SQLITE_INDEX_SCAN = re.compile(r"^SCAN (products|reviews) USING (COVERING )?INDEX\b")
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (products|reviews)\b")
+
+
+@pytest.fixture(scope="module")
+async def environment(dataset):
+    engine = database.init_engines()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tests") as client:
+            yield client, dataset, statements
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+def is_full_scan(dialect: str, statement: str, line: str) -> bool:
+    if dialect == "postgresql":
+        return bool(POSTGRES_FULL_SCAN.search(line))
+    if not SQLITE_SCAN.match(line):
+        return False
+    return not (SQLITE_INDEX_SCAN.match(line) and LIMIT.search(statement))
+
+
+async def explain(statement: str, parameters) -> list[str]:
+    async with database.async_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # На маленькой тестовой базе Postgres выбрал бы Seq Scan и при подходящем индексе
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            rows = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+            return [row[0] for row in rows]
+        rows = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in rows]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.name for scenario in SCENARIOS])
+async def test_no_full_scans(environment, scenario):
+    client, dataset, statements = environment
+    statements.clear()
+    response = await client.request(scenario.method, **scenario.build(dataset, 0))
+    assert response.status_code == scenario.expected_status, response.text
+    if scenario.name in FULL_SCAN_ALLOWED:
+        return
+
+    dialect = database.async_engine.dialect.name
+    for statement, parameters in list(statements):
+        plan = await explain(statement, parameters)
+        assert not any(is_full_scan(dialect, statement, line.strip()) for line in plan), \
+            f"{' '.join(statement.split())}\n" + "\n".join(plan)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("scenario", BUDGETED, ids=[scenario.name for scenario in BUDGETED])
+async def test_db_query_budget(environment, scenario):
+    client, dataset, _ = environment
+    # Первый запрос заполняет кэши пользователей и категорий, как прогрев в benchmarks.measure
+    for i in (1, 2):
+        response = await client.request(scenario.method, **scenario.build(dataset, i))
+        assert response.status_code == scenario.expected_status, response.text
+    assert db_queries(response) <= scenario.max_db_queries, response.headers.get("server-timing")
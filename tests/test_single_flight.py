@@ -0,0 +1,82 @@
+"""
+Объединение одновременных чтений: N одинаковых запросов на холодном кэше выполняют в базе столько же
+запросов, сколько один, а ошибка общего вызова доходит до всех ожидающих и не остаётся за ключом.
+"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.main import app
+from app.single_flight import SingleFlight
+
+CALLERS = 20
+
+
+@pytest.fixture(scope="module")
+async def environment(dataset):
+    async with app.router.lifespan_context(app):
+        engine = database.async_engine
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tests") as client:
+            yield client, dataset, statements
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def concurrent_get(client: httpx.AsyncClient, url: str) -> list[httpx.Response]:
+    return await asyncio.gather(*(client.get(url) for _ in range(CALLERS)))
+
+
+@pytest.mark.anyio
+async def test_product_reads_share_one_query(environment):
+    client, dataset, statements = environment
+    statements.clear()
+    responses = await concurrent_get(client, f"/products/{dataset.product_ids[1]}")
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.anyio
+async def test_category_page_reads_share_two_queries(environment):
+    client, dataset, statements = environment
+    statements.clear()
+    # Проверка категории и страница товаров
+    responses = await concurrent_get(client, f"/products/category/{dataset.leaf_category_ids[1]}?limit=7")
+    assert {response.status_code for response in responses} == {200}
+    assert len(statements) == 2, statements
+
+
+@pytest.mark.anyio
+async def test_failing_call_reaches_all_waiters_and_frees_key():
+    flight = SingleFlight(timeout=5)
+    release = asyncio.Event()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        raise RuntimeError("database is down")
+
+    waiters = [asyncio.create_task(flight.do("key", failing)) for _ in range(CALLERS)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(flight) == 0
+
+    async def succeeding():
+        return 42
+
+    assert await flight.do("key", succeeding) == 42